@@ -1,5 +1,9 @@
+import sys
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from api.routes.prices import router as price_router
+from api.routes.jobs import router as jobs_router
+from api.services.metrics import METRICS_ENABLED, metrics
 
 app = FastAPI()
 
@@ -19,4 +23,32 @@ async def health_check():
 async def hello():
     return {"message": "Hello from Python!"}
 
-app.include_router(price_router, prefix="/api")
\ No newline at end of file
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    if not METRICS_ENABLED:
+        return PlainTextResponse("# metrics disabled (METRICS_ENABLED=0)\n", status_code=404)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+async def start_monitors():
+    from api.services.executor import start_loop_lag_monitor
+    start_loop_lag_monitor()
+
+@app.on_event("shutdown")
+async def close_pools():
+    # Backends are imported lazily; only the ones a request loaded hold anything
+    browser_pool = sys.modules.get("api.services.helper.browser_pool")
+    if browser_pool is not None:
+        await browser_pool.browser_pool.close()
+    http_client = sys.modules.get("api.services.http_client")
+    if http_client is not None:
+        await http_client.fetch_engine.close()
+    executor = sys.modules.get("api.services.executor")
+    if executor is not None:
+        executor.parse_executor.close()
+    ratelimit = sys.modules.get("api.services.helper.ratelimit")
+    if ratelimit is not None:
+        ratelimit.rate_limiter.save()
+
+app.include_router(price_router, prefix="/api")
+app.include_router(jobs_router, prefix="/api")
\ No newline at end of file
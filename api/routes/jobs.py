@@ -0,0 +1,28 @@
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from api.schemas.job import ScrapeJobRequest
+from api.services.jobs import get_store, run_job, job_report, needs_worker, load_category_urls
+
+router = APIRouter()
+
+@router.post("/scrape-jobs", status_code=202)
+async def create_scrape_job(request: ScrapeJobRequest, background_tasks: BackgroundTasks):
+    urls = list(request.urls)
+    if request.all_categories:
+        urls.extend(load_category_urls())
+    if not urls:
+        raise HTTPException(status_code=400, detail="Provide urls or set all_categories")
+
+    job_id = get_store().create_job(urls)
+    background_tasks.add_task(run_job, job_id)
+    return {"id": job_id, "status": "queued", "targets": len(urls)}
+
+
+@router.get("/scrape-jobs/{job_id}")
+async def get_scrape_job(job_id: str, background_tasks: BackgroundTasks, include_items: bool = True):
+    report = job_report(job_id, include_items=include_items)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    # Polling resumes a job whose last worker ran out of time or crashed
+    if needs_worker(report):
+        background_tasks.add_task(run_job, job_id)
+    return report
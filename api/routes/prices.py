@@ -1,13 +1,22 @@
-from fastapi import APIRouter, HTTPException
-from api.services.scraper import scrape_online_price
-from api.schemas.price import PriceResponse
-from api.services.helper.carrefourbs import run_carrefour_scraper
+import json
+import time
+from typing import List
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from api.schemas.price import PriceResponse, PriceRequest, BatchPriceResponse
+from api.services.cache import response_cache, cache_headers
+from api.services.price_history import get_price_store
+from api.services.items import ItemBatch, EXPORT_FORMATS
+from api.services.search import SEARCH_SORTS, get_search_index
 
 router = APIRouter()
 
 @router.get("/get-price", response_model=PriceResponse)
-async def get_item_price(url: str, item_name: str = "Unknown"):
-    data = scrape_online_price(url)
+async def get_item_price(response: Response, url: str, item_name: str = "Unknown"):
+    # Scraper backends load on first use so light routes stay fast on cold starts
+    from api.services.scraper import cached_online_price
+    data, cache_status, age = await cached_online_price(url)
+    cache_headers(response, cache_status, age)
     return {
         "item": item_name,
         "price": data["price"],
@@ -16,14 +25,153 @@ async def get_item_price(url: str, item_name: str = "Unknown"):
     }
 
 
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+def format_event(event, stream):
+    if stream == "sse":
+        return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    return json.dumps(event) + "\n"
+
+
+@router.post("/get-prices", response_model=BatchPriceResponse)
+async def get_item_prices(items: List[PriceRequest], stream: str = None):
+    if stream is not None and stream not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"stream must be one of: {', '.join(STREAM_FORMATS)}")
+    from api.services.scraper import iter_online_prices, BATCH_MAX_ITEMS
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+
+    started = time.perf_counter()
+    unique_urls = len({item.url for item in items})
+
+    def result(i, data, cache_status, seconds):
+        return {
+            "index": i,
+            "item": items[i].item_name,
+            "price": data["price"],
+            "source": data["source"],
+            "status": data["status"],
+            "cache": cache_status,
+            "elapsed_ms": round(seconds * 1000, 1),
+        }
+
+    def summary(results):
+        succeeded = sum(1 for r in results if r["status"] == "success")
+        return {
+            "total": len(items), "unique_urls": unique_urls, "succeeded": succeeded,
+            "failed": len(results) - succeeded, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    if stream is None:
+        results = [result(*row) async for row in iter_online_prices([item.url for item in items])]
+        results.sort(key=lambda r: r["index"])
+        return {**summary(results), "results": results}
+
+    async def body():
+        # Completion order; "index" ties each line back to the request
+        results = []
+        async for row in iter_online_prices([item.url for item in items]):
+            results.append(result(*row))
+            yield format_event({"type": "price", **results[-1]}, stream)
+        yield format_event({"type": "summary", **summary(results)}, stream)
+
+    return StreamingResponse(body(), media_type=STREAM_FORMATS[stream])
+
+async def stream_scrape(target_url, stream):
+    from api.services.helper.carrefourbs import iter_carrefour_scraper
+    events = iter_carrefour_scraper(target_url)
+    try:
+        # Pull the first event here so setup errors still become a 500
+        first = await events.__anext__()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def body():
+        try:
+            yield format_event(first, stream)
+            async for event in events:
+                yield format_event(event, stream)
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(body(), media_type=STREAM_FORMATS[stream])
+
+
+async def scrape_run(target_url):
+    from api.services.helper.carrefourbs import scrape_carrefour
+    data, summary = await scrape_carrefour(target_url)
+    # Cached in columnar form: categoricals stored once, prices as numbers
+    return {"items": ItemBatch.from_dicts(data).to_columns(), "metrics": summary.get("metrics") if summary else None}
+
+def cached_batch(result):
+    # Older entry shapes live under an earlier SCRAPER_VERSION key and never get here
+    return ItemBatch.from_columns(result["items"]), result["metrics"]
+
+
 @router.get("/scrape")
-async def scrape_endpoint(category: str = "Fruits", subcategory: str = "Fresh"):
+async def scrape_endpoint(category: str = "Fruits", subcategory: str = "Fresh", stream: str = None, format: str = "json"):
     # Target URL (Adjust as needed)
     # target_url = "https://www.carrefour.pk/mafpak/en/c/FPAK1660000"
     target_url = "https://www.carrefour.pk/mafpak/en/n/c/clp_FPAK1600000"
+
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if stream is not None:
+        if stream not in STREAM_FORMATS:
+            raise HTTPException(status_code=400, detail=f"stream must be one of: {', '.join(STREAM_FORMATS)}")
+        if format != "json":
+            raise HTTPException(status_code=400, detail="stream is only available with format=json")
+        return await stream_scrape(target_url, stream)
     
     try:
-        data = await run_carrefour_scraper(target_url);
-        return {"status": "success", "total_items": len(data), "data": data}
+        result, cache_status, age = await response_cache.get_or_fetch(
+            "scrape", target_url, lambda: scrape_run(target_url),
+            should_store=lambda d: d["items"]["n"] > 0
+        )
+        batch, metrics = cached_batch(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    try:
+        # On a cache hit these are the timings of the run that produced the data
+        body = batch.export(format, status="success", total_items=len(batch), metrics=metrics)
+    except ImportError as e:
+        # Only arrow/parquet have an optional dependency; anything else is a real failure
+        if format not in ("arrow", "parquet"):
+            raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=501, detail=f"format={format} needs pyarrow installed")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    response = Response(content=body, media_type=EXPORT_FORMATS[format])
+    cache_headers(response, cache_status, age)
+    return response
+
+
+
+@router.get("/prices/history")
+async def price_history(url: str, limit: int = 500):
+    data = get_price_store().history(url, limit=limit)
+    if data is None:
+        raise HTTPException(status_code=404, detail="No price history for this URL")
+    return data
+
+
+@router.get("/prices/changes")
+async def price_changes(since: float, limit: int = 1000, include_new: bool = False):
+    changes = get_price_store().changes(since, limit=limit, include_new=include_new)
+    return {"since": since, "total": len(changes), "changes": changes}
+
+
+@router.get("/search")
+async def search_items(q: str = "", unit: str = None, sort: str = "unit_price", limit: int = 20):
+    if sort not in SEARCH_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SEARCH_SORTS)}")
+    limit = max(1, min(limit, 500))
+    index = get_search_index()
+    started = time.perf_counter()
+    total, results = index.search(q=q, unit=unit, sort=sort, limit=limit)
+    return {
+        "q": q, "unit": unit, "sort": sort, "total_matches": total, "indexed": len(index),
+        "took_ms": round((time.perf_counter() - started) * 1000, 3), "results": results,
+    }
@@ -0,0 +1,6 @@
+from typing import List
+from pydantic import BaseModel
+
+class ScrapeJobRequest(BaseModel):
+    urls: List[str] = []
+    all_categories: bool = False
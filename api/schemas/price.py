@@ -1,7 +1,25 @@
+from typing import List
 from pydantic import BaseModel
 
 class PriceResponse(BaseModel):
     item: str
     price: str
     source: str
-    status: str
\ No newline at end of file
+    status: str
+
+class PriceRequest(BaseModel):
+    url: str
+    item_name: str = "Unknown"
+
+class BatchPriceResult(PriceResponse):
+    index: int
+    cache: str
+    elapsed_ms: float
+
+class BatchPriceResponse(BaseModel):
+    total: int
+    unique_urls: int
+    succeeded: int
+    failed: int
+    elapsed_ms: float
+    results: List[BatchPriceResult]
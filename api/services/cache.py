@@ -0,0 +1,166 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ----------------- CONFIG -----------------
+
+# Bump when parsing/normalization or the cached entry shape changes so old
+# entries stop matching. bs4-2: /scrape entries are stored columnar.
+SCRAPER_VERSION = os.getenv("SCRAPER_VERSION", "bs4-2")
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_PATH = os.getenv("CACHE_PATH", "/tmp/price-service-cache.sqlite3")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "512"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# endpoint -> (fresh seconds, extra seconds an entry may be served stale)
+CACHE_POLICIES = {
+    "scrape": (int(os.getenv("CACHE_TTL_SCRAPE", "21600")), int(os.getenv("CACHE_STALE_SCRAPE", "86400"))),
+    "get-price": (int(os.getenv("CACHE_TTL_GET_PRICE", "3600")), int(os.getenv("CACHE_STALE_GET_PRICE", "21600"))),
+}
+
+def log(msg):
+    print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
+
+def make_key(endpoint, url):
+    return f"{endpoint}|{SCRAPER_VERSION}|{url}"
+
+# ----------------- BACKENDS -----------------
+
+class MemoryBackend:
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (payload, stored_at, size)
+        self._bytes = 0
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        self._data.move_to_end(key)
+        return json.loads(entry[0]), entry[1]
+
+    def set(self, key, value, stored_at):
+        payload = json.dumps(value)
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= old[2]
+        self._data[key] = (payload, stored_at, len(payload))
+        self._bytes += len(payload)
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._data.popitem(last=False)
+            self._bytes -= evicted[2]
+
+
+class SQLiteBackend:
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, payload TEXT NOT NULL, stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT payload, stored_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, stored_at):
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, payload, stored_at, accessed_at, size) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, stored_at, time.time(), len(payload)),
+            )
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+            while count > self.max_entries or total > self.max_bytes:
+                row = self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at LIMIT 1").fetchone()
+                if row is None:
+                    break
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (row[0],))
+                count, total = count - 1, total - row[1]
+            self._conn.commit()
+
+
+BACKENDS = {"memory": MemoryBackend, "sqlite": SQLiteBackend}
+
+# ----------------- CACHE -----------------
+
+class ResponseCache:
+    def __init__(self, backend, policies=CACHE_POLICIES):
+        self.backend = backend
+        self.policies = policies
+        self._inflight = {}
+        self._refreshing = set()
+
+    async def _single_flight(self, key, fetch, should_store):
+        task = self._inflight.get(key)
+        if task is not None:
+            return await asyncio.shield(task), "COALESCED"
+
+        async def run():
+            try:
+                value = await fetch()
+                if should_store(value):
+                    self.backend.set(key, value, time.time())
+                return value
+            finally:
+                self._inflight.pop(key, None)
+
+        task = self._inflight[key] = asyncio.ensure_future(run())
+        return await asyncio.shield(task), "MISS"
+
+    def _revalidate(self, key, fetch, should_store):
+        if key in self._inflight:
+            return
+        log(f"🔄 Revalidating stale cache entry: {key}")
+
+        async def run():
+            try:
+                await self._single_flight(key, fetch, should_store)
+            except Exception as e:
+                log(f"⚠️ Background revalidation failed: {e}")
+
+        task = asyncio.ensure_future(run())
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
+
+    async def get_or_fetch(self, endpoint, url, fetch, should_store=bool):
+        # Returns (value, status, age_seconds); status is HIT, STALE, MISS or COALESCED
+        key = make_key(endpoint, url)
+        ttl, stale = self.policies.get(endpoint, (0, 0))
+        entry = self.backend.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < ttl:
+                return value, "HIT", age
+            if age < ttl + stale:
+                self._revalidate(key, fetch, should_store)
+                return value, "STALE", age
+        value, status = await self._single_flight(key, fetch, should_store)
+        return value, status, 0.0
+
+
+def cache_headers(response, status, age):
+    response.headers["X-Cache"] = status
+    response.headers["X-Scraper-Version"] = SCRAPER_VERSION
+    response.headers["Age"] = str(int(age))
+
+
+response_cache = ResponseCache(BACKENDS[CACHE_BACKEND]())
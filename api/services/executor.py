@@ -0,0 +1,82 @@
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from api.services.metrics import METRICS_ENABLED, observe
+
+# ----------------- CONFIG -----------------
+
+# "thread" (default), "process" or "inline" (run on the event loop, the old behaviour)
+PARSE_EXECUTOR = os.getenv("PARSE_EXECUTOR", "thread")
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.1"))
+
+def log(msg):
+    print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
+
+# ----------------- EXECUTOR -----------------
+
+class ParseExecutor:
+    # Shared pool for CPU-bound parse/normalize calls. Callers pass the HTML
+    # string in and get the small item list back; no parser objects cross over.
+    def __init__(self, mode=None, workers=None):
+        self.mode = mode or PARSE_EXECUTOR
+        self.workers = workers or PARSE_WORKERS
+        self._pool = None
+
+    def _make_pool(self):
+        if self.mode == "process":
+            # spawn: forking a process that runs Playwright's driver threads is unsafe
+            return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parse")
+
+    async def run(self, fn, *args, **kwargs):
+        if self.mode == "inline":
+            return fn(*args, **kwargs)
+        if self._pool is None:
+            self._pool = self._make_pool()
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args, **kwargs)
+        if self.mode != "process":
+            # Threads share the registry, so keep the caller's per-run metrics context
+            call = functools.partial(contextvars.copy_context().run, call)
+        return await loop.run_in_executor(self._pool, call)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+parse_executor = ParseExecutor()
+
+async def run_parse(fn, *args, **kwargs):
+    return await parse_executor.run(fn, *args, **kwargs)
+
+# ----------------- LOOP LAG -----------------
+
+_lag_tasks = {}
+
+async def _watch_loop_lag(interval):
+    # A sleep that overshoots its deadline measures how long the loop was busy
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        observe("loop_lag", max(0.0, time.perf_counter() - started - interval))
+
+def start_loop_lag_monitor(interval=LOOP_LAG_INTERVAL):
+    # One watcher per running loop; safe to call from every run
+    if not METRICS_ENABLED:
+        return None
+    loop = asyncio.get_running_loop()
+    task = _lag_tasks.get(loop)
+    if task is None or task.done():
+        for stale in [l for l in _lag_tasks if l.is_closed()]:
+            del _lag_tasks[stale]
+        # Empty context: lag is process-wide, not part of whichever run started the watcher
+        task = _lag_tasks[loop] = contextvars.Context().run(loop.create_task, _watch_loop_lag(interval))
+    return task
@@ -0,0 +1,236 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import time
+
+from api.services.items import EXPORT_FORMATS, ItemBatch
+from api.services.jobs import CATEGORY_CSV, load_category_urls
+
+# ----------------- CONFIG -----------------
+
+FANOUT_OUT_DIR = os.getenv("FANOUT_OUT_DIR", "/tmp/price-service-fanout")
+
+def log(msg):
+    print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
+
+# ----------------- SHARDING -----------------
+
+def shard_of(url, shards):
+    # Stable across processes and machines, unlike hash()
+    digest = hashlib.blake2b(url.strip().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+def shard_urls(urls, shards, shard_index):
+    return [url for url in urls if shard_of(url, shards) == shard_index]
+
+def shard_path(out_dir, shards, shard_index):
+    return os.path.join(out_dir, f"shard-{shard_index}-of-{shards}.json")
+
+# ----------------- SHARD WORKER -----------------
+
+async def run_shard(urls, shard_index, progress=None, concurrency=None):
+    # Scrapes one shard's categories in this process's loop and browser session
+    from api.services.helper.browser_pool import browser_pool
+    from api.services.helper.carrefourbs import scrape_carrefour
+
+    def report(**event):
+        if progress is not None:
+            progress({"shard": shard_index, "total": len(urls), **event})
+
+    result = {"shard": shard_index, "categories": []}
+    started = time.time()
+    try:
+        for n, url in enumerate(urls, 1):
+            items, summary = await scrape_carrefour(url, concurrency=concurrency)
+            status = summary["status"] if summary else "error"
+            result["categories"].append({
+                "url": url, "status": status, "category": summary and summary.get("category"),
+                "items": len(items), "failed_subcategories": summary["failed"] if summary else [],
+                "error": summary and summary.get("error"), "data": items,
+            })
+            report(done=n, url=url, status=status, items=len(items))
+    finally:
+        await browser_pool.close()
+    result["elapsed"] = round(time.time() - started, 3)
+    return result
+
+def _shard_process(urls, shards, shard_index, out_dir, progress_queue, concurrency, rate_share):
+    # Entry point of a spawned worker: fresh interpreter, event loop and browser.
+    # Each process has its own limiter, so it only gets its share of the domain budget.
+    from api.services.helper.ratelimit import set_rate_share
+    set_rate_share(rate_share)
+    result = asyncio.run(run_shard(urls, shard_index, progress=progress_queue.put, concurrency=concurrency))
+    write_shard(result, out_dir, shards)
+    items = sum(c["items"] for c in result["categories"])
+    progress_queue.put({"shard": shard_index, "finished": True, "items": items})
+
+def write_shard(result, out_dir, shards):
+    os.makedirs(out_dir, exist_ok=True)
+    path = shard_path(out_dir, shards, result["shard"])
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    os.replace(tmp, path)
+    return path
+
+def clear_shard(out_dir, shards, shard_index):
+    # A shard file left by an earlier run would otherwise be merged as if this run wrote it
+    try:
+        os.remove(shard_path(out_dir, shards, shard_index))
+    except FileNotFoundError:
+        pass
+
+# ----------------- MERGE -----------------
+
+def merge_shards(out_dir, shards, urls=None):
+    # Combines shard files back into CSV order; missing shards are reported, not fatal
+    results, missing = {}, []
+    for i in range(shards):
+        path = shard_path(out_dir, shards, i)
+        if not os.path.exists(path):
+            missing.append(i)
+            continue
+        with open(path, encoding="utf-8") as f:
+            results[i] = json.load(f)
+
+    categories = {c["url"]: c for r in results.values() for c in r["categories"]}
+    order = urls if urls is not None else list(categories)
+    merged, items = [], []
+    for url in order:
+        if url in categories:
+            category = dict(categories[url])
+            items.extend(category.pop("data"))
+            merged.append(category)
+
+    return {
+        "shards": shards,
+        "missing_shards": missing,
+        "categories": merged,
+        "total_items": len(items),
+        "data": items,
+        "per_shard": {
+            i: {"categories": len(r["categories"]), "items": sum(c["items"] for c in r["categories"]),
+                "elapsed": r["elapsed"]}
+            for i, r in sorted(results.items())
+        },
+    }
+
+# ----------------- RUNNER -----------------
+
+def _log_progress(event):
+    if event.get("finished"):
+        log(f"✅ Shard {event['shard']} finished with {event['items']} items")
+    else:
+        log(f"📦 Shard {event['shard']} [{event['done']}/{event['total']}] "
+            f"{event['status']} {event['items']} items ← {event['url']}")
+
+def run_fanout(urls=None, shards=None, processes=None, out_dir=FANOUT_OUT_DIR, concurrency=None):
+    # Runs every shard on this box, one spawned process per shard (up to
+    # `processes` at a time), then merges the shard files. Outside Vercel,
+    # raise SCRAPE_TIME_BUDGET so large categories are not cut short.
+    urls = urls if urls is not None else load_category_urls()
+    shards = shards or os.cpu_count() or 1
+    processes = max(1, min(processes or shards, shards))
+    # Processes running at once split the per-domain rate and in-flight cap
+    rate_share = 1 / processes
+    plan = {i: shard_urls(urls, shards, i) for i in range(shards)}
+    log(f"🧩 {len(urls)} categories over {shards} shards: "
+        + ", ".join(f"#{i}={len(u)}" for i, u in plan.items()))
+
+    for i in range(shards):
+        clear_shard(out_dir, shards, i)
+        if not plan[i]:
+            # Nothing to scrape, but the shard still ran: merge must not report it missing
+            write_shard({"shard": i, "categories": [], "elapsed": 0}, out_dir, shards)
+
+    ctx = multiprocessing.get_context("spawn")
+    progress_queue = ctx.Queue()
+    pending = [i for i in range(shards) if plan[i]]
+    running = {}
+    while pending or running:
+        while pending and len(running) < processes:
+            i = pending.pop(0)
+            proc = ctx.Process(
+                target=_shard_process,
+                args=(plan[i], shards, i, out_dir, progress_queue, concurrency, rate_share),
+                name=f"shard-{i}",
+            )
+            proc.start()
+            running[i] = proc
+        try:
+            _log_progress(progress_queue.get(timeout=1))
+        except queue.Empty:
+            pass
+        for i, proc in list(running.items()):
+            if not proc.is_alive():
+                proc.join()
+                if proc.exitcode != 0:
+                    log(f"💥 Shard {i} exited with code {proc.exitcode}")
+                del running[i]
+
+    while True:
+        try:
+            _log_progress(progress_queue.get_nowait())
+        except queue.Empty:
+            break
+    return merge_shards(out_dir, shards, urls)
+
+def run_single_shard(shards, shard_index, urls=None, out_dir=FANOUT_OUT_DIR, concurrency=None):
+    # One node's share of a multi-node crawl; merge later with merge_shards()
+    urls = urls if urls is not None else load_category_urls()
+    mine = shard_urls(urls, shards, shard_index)
+    log(f"🧩 Shard {shard_index}/{shards}: {len(mine)} of {len(urls)} categories")
+
+    clear_shard(out_dir, shards, shard_index)
+    result = asyncio.run(run_shard(mine, shard_index, progress=_log_progress, concurrency=concurrency))
+    return write_shard(result, out_dir, shards)
+
+# ----------------- CLI -----------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape every category in Category.csv across shards")
+    parser.add_argument("--csv", default=CATEGORY_CSV)
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-index", type=int,
+                        help="run only this shard in-process (multi-node mode; set RATE_SHARE if nodes share an IP)")
+    parser.add_argument("--processes", type=int, help="worker processes at once (default: one per shard)")
+    parser.add_argument("--concurrency", type=int, help="pages per category run")
+    parser.add_argument("--out-dir", default=FANOUT_OUT_DIR)
+    parser.add_argument("--merge", action="store_true", help="only merge existing shard files")
+    parser.add_argument("--output", help="write the merged items here")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="json",
+                        help="file format for --output (arrow/parquet need pyarrow)")
+    args = parser.parse_args()
+
+    urls = load_category_urls(args.csv)
+    if args.shard_index is not None:
+        if not 0 <= args.shard_index < args.shards:
+            parser.error("--shard-index must be in [0, --shards)")
+        path = run_single_shard(args.shards, args.shard_index, urls, args.out_dir, args.concurrency)
+        log(f"💾 Shard written to {path}")
+        return
+
+    if args.merge:
+        merged = merge_shards(args.out_dir, args.shards, urls)
+    else:
+        merged = run_fanout(urls, args.shards, args.processes, args.out_dir, args.concurrency)
+    if merged["missing_shards"]:
+        log(f"⚠️ Missing shards: {merged['missing_shards']}")
+    log(f"🏁 {merged['total_items']} items from {len(merged['categories'])} categories")
+    if args.output:
+        if args.format == "json":
+            body = json.dumps(merged).encode("utf-8")
+        else:
+            body = ItemBatch.from_dicts(merged["data"]).export(args.format)
+        with open(args.output, "wb") as f:
+            f.write(body)
+    else:
+        print(json.dumps({k: v for k, v in merged.items() if k != "data"}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
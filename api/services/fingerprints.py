@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from api.services.cache import SCRAPER_VERSION
+
+# ----------------- CONFIG -----------------
+
+CHANGE_DETECTION = os.getenv("CHANGE_DETECTION", "1") == "1"
+FINGERPRINT_DB_PATH = os.getenv("FINGERPRINT_DB_PATH", "/tmp/price-service-fingerprints.sqlite3")
+
+def fingerprint(parts):
+    # Stable hash of an iterable of strings (card URL + visible text, or listing rows)
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode("utf-8", "replace"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+# ----------------- STORE -----------------
+
+class FingerprintStore:
+    # Last seen fingerprint and parsed items per subcategory page. Entries are
+    # keyed by SCRAPER_VERSION too, so a parser change never reuses old items.
+    def __init__(self, path=FINGERPRINT_DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            " key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, items TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _key(self, url, category, subcategory):
+        return f"{SCRAPER_VERSION}|{category}|{subcategory}|{url}"
+
+    def lookup(self, url, category, subcategory, fp):
+        # -> previous items when the page is unchanged, else None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, items FROM fingerprints WHERE key = ?",
+                (self._key(url, category, subcategory),),
+            ).fetchone()
+        if row is None or row[0] != fp:
+            return None
+        return json.loads(row[1])
+
+    def store(self, url, category, subcategory, fp, items):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fingerprints (key, fingerprint, items, updated_at) VALUES (?, ?, ?, ?)",
+                (self._key(url, category, subcategory), fp, json.dumps(items), time.time()),
+            )
+            self._conn.commit()
+
+
+_store = None
+
+def get_fingerprint_store():
+    global _store
+    if _store is None:
+        _store = FingerprintStore()
+    return _store
@@ -0,0 +1,245 @@
+import asyncio
+import contextvars
+import os
+import time
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+from api.services.helper.interception import BLOCK_RESOURCES, install_resource_blocking
+from api.services.metrics import span
+
+# ----------------- CONFIG -----------------
+
+# "browserless" connects over CDP, "local" launches a headless Chromium
+# (handy offline and in benchmarks).
+BROWSER_MODE = os.getenv("BROWSER_MODE", "browserless")
+MAX_BROWSERS = int(os.getenv("POOL_MAX_BROWSERS", "1"))
+MAX_CONTEXTS_PER_BROWSER = int(os.getenv("POOL_MAX_CONTEXTS", "4"))
+CONTEXT_IDLE_TTL = float(os.getenv("POOL_CONTEXT_IDLE_TTL", "120"))
+BROWSER_IDLE_TTL = float(os.getenv("POOL_BROWSER_IDLE_TTL", "300"))
+BROWSERLESS_SESSION_TIMEOUT = int(os.getenv("BROWSERLESS_SESSION_TIMEOUT", "50000"))
+POOL_REAP_INTERVAL = float(os.getenv("POOL_REAP_INTERVAL", "15"))
+# Browserless kills a session BROWSERLESS_SESSION_TIMEOUT ms after it opens, idle
+# or not. A session is only handed out while a full scrape (SCRAPE_TIME_BUDGET)
+# still fits before that cutoff; older ones are retired once their contexts return.
+SESSION_HEADROOM = float(os.getenv("SCRAPE_TIME_BUDGET", "45"))
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
+
+def log(msg):
+    print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
+
+def browserless_url(token):
+    return (
+        f"wss://chrome.browserless.io?token={token}"
+        f"&--disable-http2"
+        f"&--disable-blink-features=AutomationControlled"
+        f"&stealth=true"
+        f"&--location=asia"
+        f"&timeout={BROWSERLESS_SESSION_TIMEOUT}"
+    )
+
+# ----------------- POOL -----------------
+
+class _BrowserSlot:
+    def __init__(self, browser):
+        self.browser = browser
+        self.in_use = 0
+        self.idle = []  # [(options_key, context, released_at)]
+        self.created_at = self.last_used = time.monotonic()
+
+    def healthy(self):
+        return self.browser.is_connected()
+
+    def expired(self, max_age, now=None):
+        return max_age is not None and (now or time.monotonic()) - self.created_at > max_age
+
+    def open_contexts(self):
+        return self.in_use + len(self.idle)
+
+
+class BrowserPool:
+    def __init__(self, mode=None, max_browsers=None, max_contexts=None,
+                 context_idle_ttl=None, browser_idle_ttl=None):
+        self.mode = mode or BROWSER_MODE
+        self.max_browsers = max_browsers or MAX_BROWSERS
+        self.max_contexts = max_contexts or MAX_CONTEXTS_PER_BROWSER
+        self.context_idle_ttl = CONTEXT_IDLE_TTL if context_idle_ttl is None else context_idle_ttl
+        self.browser_idle_ttl = BROWSER_IDLE_TTL if browser_idle_ttl is None else browser_idle_ttl
+        # Local Chromium has no session cap
+        self.max_session_age = (
+            BROWSERLESS_SESSION_TIMEOUT / 1000 - SESSION_HEADROOM if self.mode == "browserless" else None
+        )
+        self._playwright = None
+        self._slots = []
+        self._cond = None
+        self._loop = None
+        self._reaper = None
+
+    async def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Playwright handles are bound to the loop that created them
+            self._playwright, self._slots, self._cond, self._loop = None, [], None, loop
+            self._reaper = None
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        if self._playwright is None:
+            async with self._cond:
+                # Re-check: concurrent first callers must share one driver
+                if self._playwright is None:
+                    log("🎭 Starting Playwright driver")
+                    self._playwright = await async_playwright().start()
+        if self._reaper is None or self._reaper.done():
+            # Empty context so the long-lived task doesn't hold a caller's run metrics
+            self._reaper = contextvars.Context().run(loop.create_task, self._reap_forever())
+
+    async def _reap_forever(self):
+        # Closes idle contexts/sessions even when no new checkouts arrive
+        while True:
+            await asyncio.sleep(POOL_REAP_INTERVAL)
+            try:
+                async with self._cond:
+                    await self._reap()
+            except Exception as e:
+                log(f"⚠️ Pool reaper error: {e}")
+
+    async def _connect(self):
+        with span("browser_connect"):
+            return await self._open_browser()
+
+    async def _open_browser(self):
+        if self.mode == "local":
+            log("🖥️ Launching local headless Chromium")
+            browser = await self._playwright.chromium.launch(
+                headless=True,
+                args=["--disable-blink-features=AutomationControlled", "--no-sandbox"]
+            )
+        else:
+            browser_token = os.getenv("BROWSERLESS_TOKEN")
+            if not browser_token:
+                raise Exception("BROWSERLESS_TOKEN is not set")
+            log("🔌 Connecting to Browserless...")
+            browser = await self._playwright.chromium.connect_over_cdp(browserless_url(browser_token))
+            log("✅ Connected to remote browser")
+        slot = _BrowserSlot(browser)
+        self._slots.append(slot)
+        return slot
+
+    async def _close_quietly(self, obj):
+        try:
+            await obj.close()
+        except Exception:
+            pass
+
+    async def _reap(self):
+        now = time.monotonic()
+        for slot in list(self._slots):
+            if not slot.healthy():
+                log("♻️ Dropping dead browser connection")
+                self._slots.remove(slot)
+                continue
+            expired = slot.expired(self.max_session_age, now)
+            fresh = []
+            for entry in slot.idle:
+                if expired or now - entry[2] > self.context_idle_ttl:
+                    await self._close_quietly(entry[1])
+                else:
+                    fresh.append(entry)
+            slot.idle = fresh
+            if slot.open_contexts() == 0 and (expired or now - slot.last_used > self.browser_idle_ttl):
+                log("⌛ Retiring browser session near its time limit" if expired else "💤 Recycling idle browser session")
+                self._slots.remove(slot)
+                await self._close_quietly(slot.browser)
+
+    async def _checkout(self, key, options):
+        async with self._cond:
+            while True:
+                await self._reap()
+                # _reap already emptied the idle list of expired sessions
+                live = [s for s in self._slots if not s.expired(self.max_session_age)]
+                for slot in live:
+                    for n, entry in enumerate(slot.idle):
+                        if entry[0] == key:
+                            slot.idle.pop(n)
+                            slot.in_use += 1
+                            return slot, entry[1]
+                slot = next((s for s in live if s.open_contexts() < self.max_contexts), None)
+                if slot is None and len(self._slots) < self.max_browsers:
+                    slot = await self._connect()
+                if slot is None:
+                    # Full: evict an idle context with other options, else wait for a release
+                    victim = next((s for s in self._slots if s.idle), None)
+                    if victim is not None:
+                        await self._close_quietly(victim.idle.pop(0)[1])
+                        continue
+                    await self._cond.wait()
+                    continue
+                slot.in_use += 1
+                break
+        try:
+            context = await slot.browser.new_context(**options)
+            if BLOCK_RESOURCES:
+                await install_resource_blocking(context)
+        except Exception:
+            async with self._cond:
+                slot.in_use -= 1
+                if not slot.healthy() and slot in self._slots:
+                    self._slots.remove(slot)
+                self._cond.notify_all()
+            raise
+        return slot, context
+
+    async def _checkin(self, slot, key, context, reusable):
+        async with self._cond:
+            slot.in_use -= 1
+            slot.last_used = time.monotonic()
+            if reusable and slot.healthy() and slot in self._slots and not slot.expired(self.max_session_age):
+                for page in context.pages:
+                    await self._close_quietly(page)
+                slot.idle.append((key, context, slot.last_used))
+            else:
+                await self._close_quietly(context)
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def context(self, **options):
+        await self._ensure_started()
+        options.setdefault("user_agent", DEFAULT_USER_AGENT)
+        key = repr(sorted(options.items()))
+        try:
+            slot, context = await self._checkout(key, options)
+        except Exception:
+            # One reconnect attempt if the pooled connection died under us
+            async with self._cond:
+                await self._reap()
+            slot, context = await self._checkout(key, options)
+        reusable = True
+        try:
+            yield context
+        except BaseException:
+            reusable = False
+            raise
+        finally:
+            await self._checkin(slot, key, context, reusable)
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "browsers": len(self._slots),
+            "contexts_in_use": sum(s.in_use for s in self._slots),
+            "contexts_idle": sum(len(s.idle) for s in self._slots),
+        }
+
+    async def close(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        for slot in self._slots:
+            await self._close_quietly(slot.browser)
+        self._slots = []
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+browser_pool = BrowserPool()
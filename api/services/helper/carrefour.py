@@ -1,18 +1,15 @@
 import time
-import random
-import re
-import asyncio
 from urllib.parse import urlparse
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+from playwright.async_api import TimeoutError as PlaywrightTimeout
 import os
+from api.services.helper.browser_pool import browser_pool
+from api.services.helper.ratelimit import rate_limiter
+from api.services.helper.normalize import normalize_to_bulk_price_v1 as normalize_to_bulk_price
 # ----------------- HELPERS -----------------
 
 def log(msg):
     print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
 
-async def human_delay(a=2, b=5):
-    await asyncio.sleep(random.uniform(a, b))
-
 async def is_blocked(page):
     try:
         content = (await page.inner_text("body")).lower()
@@ -23,37 +20,21 @@ async def is_blocked(page):
 async def safe_goto(page, url, retries=3):
     for attempt in range(1, retries + 1):
         log(f"🌐 Navigating (attempt {attempt}) → {url}")
+        await rate_limiter.acquire(url)
         try:
             await page.goto(url, wait_until="domcontentloaded", timeout=45000)
-            await human_delay(4, 7)
             if not await is_blocked(page):
+                rate_limiter.report(url, "ok")
                 return True
-            log("⚠️ BLOCK PAGE detected — cooling down...")
-            await human_delay(12, 18)
+            log("⚠️ BLOCK PAGE detected — backing off...")
+            rate_limiter.report(url, "blocked")
         except PlaywrightTimeout:
             log("⏱ Page timeout — retrying")
+            rate_limiter.report(url, "timeout")
     return False
 
 # ----------------- SCRAPERS -----------------
 
-def normalize_to_bulk_price(price_str, unit_qty_str):
-    try:
-        price = float(re.sub(r'[^\d.]', '', price_str))
-        match = re.search(r'(\d+(?:\.\d+)?)\s*([a-zA-Z]+)', unit_qty_str.lower())
-        if not match:
-            return price, "Unit"
-        value = float(match.group(1))
-        unit = match.group(2)
-        if unit in ['g', 'gm', 'grams']:
-            return (price / value) * 1000, "KG"
-        elif unit in ['ml', 'milliliter']:
-            return (price / value) * 1000, "Litre"
-        elif unit in ['kg', 'l', 'liter']:
-            return price / value, unit.upper()
-        return price, "Unit"
-    except:
-        return 0.0, "Unknown"
-
 async def extract_subcategories(page, domain_base):
     log("🔍 Checking for subcategories")
     subcats = []
@@ -75,8 +56,7 @@ async def extract_subcategories(page, domain_base):
             continue
     return subcats
 
-async def scrape_items_to_list(page, category, subcategory, domain_base):
-    log(f"🛒 Scraping items | {subcategory or 'DIRECT'}")
+async def scrape_items_per_element(page, category, subcategory, domain_base):
     items_list = []
     try:
         await page.wait_for_selector('div.relative.w-\\[134px\\]', timeout=10000)
@@ -118,6 +98,104 @@ async def scrape_items_to_list(page, category, subcategory, domain_base):
         pass
     return items_list
 
+# "evaluate" pulls every card in one page.evaluate round-trip,
+# "elements" is the original per-element CDP path.
+CARD_EXTRACTION = os.getenv("CARD_EXTRACTION", "evaluate")
+
+# First selector in each list is the one the per-element path uses,
+# the rest are fallbacks for markup drift.
+CARD_SELECTORS = {
+    "card": ['div.relative.w-\\[134px\\]', 'div[class*="relative w-[134px]"]', 'div[class*="w-[134px]"]'],
+    "name": ['div.line-clamp-2 span', 'div[class*="line-clamp-2"]'],
+    "price_main": ['div.text-lg.font-bold', 'div[class*="text-lg"][class*="font-bold"]'],
+    "price_decimal": ['div.text-2xs.font-bold', 'div[class*="text-2xs"][class*="font-bold"]'],
+    "qty": ['div.text-gray-500.truncate', 'div[class*="text-gray-500"][class*="truncate"]'],
+    "link": ['a[href*="/p/"]'],
+}
+
+EXTRACT_CARDS_JS = """
+(sel) => {
+    const pick = (root, list) => {
+        for (const s of list) {
+            const el = root.querySelector(s);
+            if (el) return el;
+        }
+        return null;
+    };
+    let cards = [];
+    for (const s of sel.card) {
+        cards = document.querySelectorAll(s);
+        if (cards.length) break;
+    }
+    return Array.from(cards, (card) => {
+        const name = pick(card, sel.name);
+        const main = pick(card, sel.price_main);
+        const dec = pick(card, sel.price_decimal);
+        const qty = pick(card, sel.qty);
+        const link = pick(card, sel.link);
+        return [
+            name ? name.innerText : null,
+            main ? main.innerText : null,
+            dec ? dec.innerText : null,
+            qty ? qty.innerText : null,
+            link ? link.getAttribute("href") : null,
+        ];
+    });
+}
+"""
+
+def build_item(category, subcategory, domain_base, name, price_main, price_decimal, big_qty, href):
+    # Mirrors scrape_items_to_list field for field; None means "element not found"
+    name = name.strip() if name is not None else "N/A"
+    if price_main is not None:
+        if price_decimal is None:
+            return None
+        price_val = f"{price_main.strip()}{price_decimal.strip()}"
+    else:
+        price_val = "0"
+
+    big_qty = big_qty.strip() if big_qty is not None else ""
+    unit_qty = big_qty.split('-')[0].strip() if '-' in big_qty else big_qty
+
+    bulk_price, base_unit = normalize_to_bulk_price(price_val, unit_qty)
+
+    item_url = domain_base + href if href is not None else ""
+
+    return {
+        "Category": category,
+        "Subcategory": subcategory,
+        "Item_Name": name,
+        "Price": price_val,
+        "Currency": "PKR",
+        "Big_Qty": big_qty,
+        "Unit_Qty": unit_qty,
+        "Base_Unit_Price": f"{bulk_price:.2f}",
+        "Base_Unit": base_unit,
+        "Item_URL": item_url
+    }
+
+async def scrape_items_evaluate(page, category, subcategory, domain_base):
+    items_list = []
+    try:
+        await page.wait_for_selector(", ".join(CARD_SELECTORS["card"]), timeout=10000)
+        rows = await page.evaluate(EXTRACT_CARDS_JS, CARD_SELECTORS)
+    except:
+        return items_list
+    for row in rows:
+        try:
+            item = build_item(category, subcategory, domain_base, *row)
+        except:
+            continue
+        if item is not None:
+            items_list.append(item)
+    return items_list
+
+async def scrape_items_to_list(page, category, subcategory, domain_base):
+    log(f"🛒 Scraping items | {subcategory or 'DIRECT'}")
+    if CARD_EXTRACTION == "elements":
+        return await scrape_items_per_element(page, category, subcategory, domain_base)
+    return await scrape_items_evaluate(page, category, subcategory, domain_base)
+
 # ----------------- MAIN ORCHESTRATOR -----------------
 async def run_carrefour_scraper(target_url: str):
     log("🚀 Starting Scraper Orchestrator")
@@ -125,37 +203,22 @@ async def run_carrefour_scraper(target_url: str):
     parsed_uri = urlparse(target_url)
     domain_base = f"{parsed_uri.scheme}://{parsed_uri.netloc}"
     
-    browser_token = os.getenv("BROWSERLESS_TOKEN")
-    if not browser_token:
+    if browser_pool.mode != "local" and not os.getenv("BROWSERLESS_TOKEN"):
         log("❌ ERROR: BROWSERLESS_TOKEN missing")
         raise Exception("BROWSERLESS_TOKEN is not set in environment variables")
 
     all_data = []
 
-    async with async_playwright() as p:
-        log("🔌 Connecting to Browserless...")
-        connection_url = (
-            f"wss://chrome.browserless.io?token={browser_token}"
-            f"&--disable-http2" 
-            f"&--disable-blink-features=AutomationControlled"
-            f"&stealth=true"
-            f"&--location=asia"
-            f"&timeout=50000"
-        )
-
-        try:
-            browser = await p.chromium.connect_over_cdp(connection_url)
-            log("✅ Connected to remote browser")
-            
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
-                extra_http_headers={
-                    "Accept-Language": "en-US,en;q=0.9",
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-                    "sec-ch-ua": '"Not.A/Brand";v="99", "Chromium";v="121"',
-                    "sec-ch-ua-platform": '"Windows"'
-                }
-            )
+    try:
+        async with browser_pool.context(
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+            extra_http_headers={
+                "Accept-Language": "en-US,en;q=0.9",
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+                "sec-ch-ua": '"Not.A/Brand";v="99", "Chromium";v="121"',
+                "sec-ch-ua-platform": '"Windows"'
+            }
+        ) as context:
             page = await context.new_page()
 
             log(f"🌐 Navigating to Main URL: {target_url}")
@@ -192,12 +255,9 @@ async def run_carrefour_scraper(target_url: str):
             else:
                 log("❌ FAILED to load Main URL (Check safe_goto logs)")
 
-        except Exception as e:
-            log(f"💥 CRITICAL ERROR during scrape: {str(e)}")
-            raise e
-        finally:
-            log("🔒 Closing browser connection")
-            await browser.close()
+    except Exception as e:
+        log(f"💥 CRITICAL ERROR during scrape: {str(e)}")
+        raise e
             
     log(f"🏁 Scraper finished. Total items collected: {len(all_data)}")
     return all_data
@@ -210,14 +270,9 @@ async def run_carrefour_scraper_PlaywrightOld(target_url: str):
     
     all_data = []
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True, 
-            args=["--disable-blink-features=AutomationControlled", "--no-sandbox"]
-        )
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0 Safari/537.36"
-        )
+    async with browser_pool.context(
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0 Safari/537.36"
+    ) as context:
         page = await context.new_page()
 
         if await safe_goto(page, target_url):
@@ -240,5 +295,4 @@ async def run_carrefour_scraper_PlaywrightOld(target_url: str):
                 data = await scrape_items_to_list(page, category, "DIRECT", domain_base)
                 all_data.extend(data)
 
-        await browser.close()
-        return all_data
\ No newline at end of file
+    return all_data
\ No newline at end of file
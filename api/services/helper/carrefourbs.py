@@ -1,193 +1,104 @@
 import time
-import random
+import json
 import re
 import asyncio
 import os
 from urllib.parse import urlparse
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
-from bs4 import BeautifulSoup
+from playwright.async_api import TimeoutError as PlaywrightTimeout
+from api.services.helper.parsers import get_parser
+from api.services.helper.normalize import normalize_to_bulk_price
+from api.services.helper.browser_pool import browser_pool
+from api.services.helper.ratelimit import rate_limiter, domain_slot
+from api.services.price_history import record_scrape
+from api.services.search import index_scrape
+from api.services.snapshots import SNAPSHOT_ARCHIVE, archive_snapshot_async, archive_unchanged_async
+from api.services.fingerprints import CHANGE_DETECTION, fingerprint, get_fingerprint_store
+from api.services.helper.interception import page_traffic
+from api.services.helper.network_capture import EXTRACTION_MODE, ResponseCapture
+from api.services.metrics import span, observe, inc, start_run, end_run
+from api.services.executor import run_parse, start_loop_lag_monitor
 
 # ----------------- HELPERS -----------------
 
 def log(msg):
     print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
 
-async def human_delay(a=2, b=4):
-    await asyncio.sleep(random.uniform(a, b))
-
 async def is_blocked(page):
     try:
         # Check specifically for the "Distil" or "Access Denied" text
         content = (await page.content()).lower()
         # If it finds 'access denied' or 'captcha', it's definitely a block
-        return any(x in content for x in ["access denied", "distil_identification_block", "please verify you are a human"])
+        if any(x in content for x in ["access denied", "distil_identification_block", "please verify you are a human"]):
+            return True
+        # The error page wording also sits in inline i18n bundles, so only trust the visible text
+        return "technical issues at our end" in (await page.inner_text("body")).lower()
     except:
         return False
 
 async def safe_goto(page, url, retries=2):
     for attempt in range(1, retries + 1):
         log(f"🌐 Navigating (attempt {attempt}) → {url}")
+        if attempt > 1:
+            inc("retries")
+        # Pacing comes from the shared per-domain limiter instead of fixed sleeps
+        with span("rate_wait"):
+            await rate_limiter.acquire(url)
         try:
             # Using domcontentloaded is faster for BeautifulSoup extraction
-            await page.goto(url, wait_until="domcontentloaded", timeout=35000)
-            await asyncio.sleep(2) # Minimal wait for JS
-            
-            if not await is_blocked(page):
+            with span("navigate"):
+                await page.goto(url, wait_until="domcontentloaded", timeout=35000)
+
+            with span("block_check"):
+                blocked = await is_blocked(page)
+            if not blocked:
+                rate_limiter.report(url, "ok")
+                inc("pages", label="ok")
                 return True
             
-            log("⚠️ BLOCK PAGE detected — cooling down...")
-            await asyncio.sleep(5)
+            log("⚠️ BLOCK PAGE detected — backing off...")
+            rate_limiter.report(url, "blocked")
+            inc("pages", label="blocked")
+            inc("blocks")
         except PlaywrightTimeout:
             log("⏱ Page timeout — retrying")
+            rate_limiter.report(url, "timeout")
+            inc("pages", label="timeout")
     return False
 
 # ----------------- EXTRACTION LOGIC -----------------
-def normalize_to_bulk_price(price_str, unit_qty_str, item_name=""):
-    try:
-        # 1. Clean the price (remove commas and currency markers)
-        clean_price_str = re.sub(r'[^\d.]', '', price_str.replace(',', ''))
-        price = float(clean_price_str)
-        
-        # Combine name and qty string to catch all variations
-        search_text = f"{item_name} {unit_qty_str}".lower()
-        
-        # 2. Extract Multiplier (Pack Size)
-        # Patterns for: "pack of 12", "12 pcs", "12 units", "12x200ml", "200mlx12", "12 x 1l"
-        multi_patterns = [
-            r'pack of\s*(\d+)',            # "pack of 12"
-            r'(\d+)\s*pcs',                # "12 pcs" or "12pcs"
-            r'(\d+)\s*units',              # "12 units"
-            r'(\d+)\s*packs',              # "12 packs"
-            r'x\s*(\d+)(?!\s*[a-z])',      # "x 12" (not followed by a unit like x 12g)
-            r'(?<![0-9])(\d+)\s*x\s*(?![0-9])', # "12 x" (standalone x)
-            r'(\d+)\s*x\s*\d+\s*[a-z]+',   # "12 x 200ml"
-            r'\d+\s*[a-z]+\s*x\s*(\d+)'    # "200ml x 12"
-        ]
-        
-        multiplier = 1
-        found_pack = False
-        for pattern in multi_patterns:
-            match = re.search(pattern, search_text)
-            if match:
-                # Get the first captured group that isn't None
-                val = next((g for g in match.groups() if g is not None), None)
-                if val:
-                    multiplier = float(val)
-                    found_pack = True
-                    break
-        
-        # If it's a multi-pack, calculate price per single item in that pack
-        if found_pack and multiplier > 1:
-            return (price / multiplier), "1 Unit"
-
-        # 3. Standard Weight/Volume Normalization (Only if no pack multiplier was found)
-        weight_match = re.search(r'(\d+(?:\.\d+)?)\s*(g|gm|grams|kg|ml|l|liter|litre|lt)', search_text)
-        
-        if weight_match:
-            value = float(weight_match.group(1))
-            unit = weight_match.group(2)
-            
-            if value > 0:
-                if unit in ['g', 'gm', 'grams']:
-                    return (price / value) * 1000, "1 KG"
-                elif unit in ['ml', 'milliliter']:
-                    return (price / value) * 1000, "1 Litre"
-                elif unit in ['kg', 'l', 'liter', 'litre', 'lt']:
-                    # Already in base unit (1kg or 1L)
-                    return (price / value), f"1 {unit.upper().replace('LT', 'L')[:1]}"
-
-        # Default fallback
-        return price, "Unit"
-    except Exception as e:
-        # In case of any error, return the original price to avoid returning 0
-        return price if 'price' in locals() else 0.0, "Unit"    
-    
 
-def normalize_to_bulk_price_v1(price_str, unit_qty_str):
-    try:
-        price = float(re.sub(r'[^\d.]', '', price_str))
-        match = re.search(r'(\d+(?:\.\d+)?)\s*([a-zA-Z]+)', unit_qty_str.lower())
-        if not match:
-            return price, "Unit"
-        value = float(match.group(1))
-        unit = match.group(2)
-        if unit in ['g', 'gm', 'grams']:
-            return (price / value) * 1000, "KG"
-        elif unit in ['ml', 'milliliter']:
-            return (price / value) * 1000, "Litre"
-        elif unit in ['kg', 'l', 'liter']:
-            return price / value, unit.upper()
-        return price, "Unit"
-    except:
-        return 0.0, "Unknown"
+SIZE_IN_NAME = re.compile(r'(\d+\s*(ml|g|kg|l|pack))')
 
-async def extract_subcategories(page, domain_base):
-    log("🔍 Checking for subcategories")
-    subcats = []
-    try:
-        # Wait specifically for category links
-        await page.wait_for_selector('a[href^="/mafpak/en/c/"]', timeout=5000)
-        html = await page.content()
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        links = soup.find_all('a', href=re.compile(r'^/mafpak/en/c/'))
-        for link in links:
-            name_el = link.find("div", class_="text-primary")
-            if name_el:
-                name = name_el.get_text(strip=True)
-                href = link.get('href')
-                subcats.append((name, domain_base + href))
-    except:
-        log("ℹ️ No subcategories found via selector")
-    return subcats
-
-async def scrape_items_to_list(page, category, subcategory, domain_base):
-    log(f"🛒 Scraping items | {subcategory or 'DIRECT'}")
-    
-    try:
-        # Wait for the item container using the partial class from your HTML
-        await page.wait_for_selector('div[class*="relative w-[134px]"]', timeout=8000)
-        await page.evaluate("window.scrollTo(0, 2000)")
-        await asyncio.sleep(1.5)
-    except:
-        return []
+def parse_subcategories(html, domain_base, parser=None):
+    return [(name, domain_base + href) for name, href in get_parser(parser).subcategory_links(html)]
 
-    html_content = await page.content()
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Target the main item container found in your file [cite: 1, 4, 8, 11]
-    cards = soup.find_all('div', class_=lambda x: x and 'relative w-[134px]' in x)
+def parse_items(html, category, subcategory, domain_base, parser=None):
     items_list = []
-
-    for card in cards:
+    normalize_time = 0.0
+    for name, price_main, price_decimal, href in get_parser(parser).cards(html):
         try:
             # 1. NAME - Found in a span inside a div with line-clamp-2 [cite: 4, 7, 11, 15]
-            name_el = card.find('div', class_=lambda x: x and 'line-clamp-2' in x)
-            name = name_el.get_text(strip=True) if name_el else None
             if not name: continue
 
             # 2. PRICE - Target the specific classes you identified 
-            # We look for the 'text-lg leading-5 font-bold' pattern
-            p_main = card.find('div', class_=lambda x: x and 'text-lg' in x and 'font-bold' in x)
-            # The decimals are in a separate div 
-            p_dec = card.find('div', class_=lambda x: x and 'text-2xs' in x and 'font-bold' in x)
-            
-            price_main = p_main.get_text(strip=True) if p_main else "0"
-            price_decimal = p_dec.get_text(strip=True) if p_dec else ".00"
+            # We look for the 'text-lg leading-5 font-bold' pattern, decimals are a separate div
+            price_main = price_main if price_main is not None else "0"
+            price_decimal = price_decimal if price_decimal is not None else ".00"
             # Remove any non-numeric characters like commas from the main price
             price_val = f"{price_main.replace(',', '')}{price_decimal}"
 
             # 3. QUANTITY/SIZE - Extracted from the name if no separate label exists [cite: 4, 7, 11, 15]
             # Your HTML shows sizes like "200 ml" directly in the name
-            size_match = re.search(r'(\d+\s*(ml|g|kg|l|pack))', name.lower())
+            size_match = SIZE_IN_NAME.search(name.lower())
             unit_qty = size_match.group(1) if size_match else "1 Unit"
             big_qty = name # Using full name as reference for bulk calculation
 
+            started = time.perf_counter()
             bulk_price, base_unit = normalize_to_bulk_price(price_val, unit_qty)
+            normalize_time += time.perf_counter() - started
 
             # 4. URL [cite: 3, 7, 11, 14]
-            link_el = card.find('a', href=re.compile(r'/p/'))
-            item_url = domain_base + link_el['href'] if link_el else ""
+            item_url = domain_base + href if href is not None else ""
 
             items_list.append({
                 "Category": category,
@@ -204,74 +115,366 @@ async def scrape_items_to_list(page, category, subcategory, domain_base):
         except Exception as e:
             log(f"⚠️ Skipping item due to error: {e}")
             continue
-            
+
+    # One observation per page, not per item, keeps the hot loop cheap
+    observe("normalize", normalize_time)
     return items_list
+
+def parse_network_rows(rows, category, subcategory, domain_base):
+    # rows from network_capture: (name, price_val, url, size)
+    items_list = []
+    normalize_time = 0.0
+    for name, price_val, url, _ in rows:
+        if not name: continue
+        # Same rule as parse_items, so both extraction modes yield the same rows
+        size_match = SIZE_IN_NAME.search(name.lower())
+        unit_qty = size_match.group(1) if size_match else "1 Unit"
+        started = time.perf_counter()
+        bulk_price, base_unit = normalize_to_bulk_price(price_val, unit_qty)
+        normalize_time += time.perf_counter() - started
+        if url and not url.startswith("http"):
+            url = domain_base + url
+        items_list.append({
+            "Category": category,
+            "Subcategory": subcategory,
+            "Item_Name": name,
+            "Price": price_val,
+            "Currency": "PKR",
+            "Big_Qty": name,
+            "Unit_Qty": unit_qty,
+            "Base_Unit_Price": f"{bulk_price:.2f}",
+            "Base_Unit": base_unit,
+            "Item_URL": url or ""
+        })
+    observe("normalize", normalize_time)
+    return items_list
+
+async def extract_subcategories(page, domain_base):
+    log("🔍 Checking for subcategories")
+    subcats = []
+    try:
+        # Wait specifically for category links
+        with span("wait_subcategories"):
+            await page.wait_for_selector('a[href^="/mafpak/en/c/"]', timeout=5000)
+        with span("content"):
+            html = await page.content()
+        await archive_snapshot_async(page.url, html, "category")
+        with span("parse_subcategories"):
+            subcats = await run_parse(parse_subcategories, html, domain_base)
+    except:
+        log("ℹ️ No subcategories found via selector")
+    return subcats
+
+async def wait_for_cards(page):
+    try:
+        # Wait for the item container using the partial class from your HTML
+        with span("wait_cards"):
+            await page.wait_for_selector('div[class*="relative w-[134px]"]', timeout=8000)
+        with span("scroll_settle"):
+            await page.evaluate("window.scrollTo(0, 2000)")
+            await asyncio.sleep(1.5)
+        return True
+    except:
+        return False
+
+async def scrape_items_to_list(page, category, subcategory, domain_base):
+    log(f"🛒 Scraping items | {subcategory or 'DIRECT'}")
+    if not await wait_for_cards(page):
+        return []
+
+    with span("content"):
+        html_content = await page.content()
+    await archive_snapshot_async(page.url, html_content, "items", category, subcategory)
+    with span("parse_items"):
+        return await run_parse(parse_items, html_content, category, subcategory, domain_base)
+
+# Card href + visible text, so any name/price/size change alters the fingerprint
+GRID_FINGERPRINT_JS = """
+() => Array.from(document.querySelectorAll('div[class*="relative w-[134px]"]'), (card) => {
+    const link = card.querySelector('a[href*="/p/"]');
+    return (link ? link.getAttribute("href") : "") + "|" + (card.innerText || "").replace(/\\s+/g, " ");
+})
+"""
+
+def start_capture(page):
+    return ResponseCapture(page) if EXTRACTION_MODE == "network" else None
+
+async def extract_items(page, capture, category, subcategory, domain_base):
+    # -> (items, reused). Prefer the listing JSON the page already fetched; DOM
+    # parsing is the fallback. Unchanged pages reuse the last parsed items.
+    fingerprints = get_fingerprint_store() if CHANGE_DETECTION else None
+
+    def previous_items(fp):
+        previous = fingerprints.lookup(page.url, category, subcategory, fp)
+        if previous is not None:
+            log(f"♻️ {subcategory}: unchanged since last run, reusing {len(previous)} items")
+        return previous
+
+    def remember(fp, items):
+        if items:
+            fingerprints.store(page.url, category, subcategory, fp, items)
+        return items, False
+
+    if capture is not None:
+        with span("network_capture"):
+            rows = await capture.rows(page.context)
+        if rows:
+            log(f"📡 {subcategory}: {len(rows)} products from network payloads")
+            if SNAPSHOT_ARCHIVE:
+                await archive_snapshot_async(page.url, json.dumps(rows), "rows", category, subcategory)
+            if fingerprints is None:
+                with span("parse_network_rows"):
+                    return await run_parse(parse_network_rows, rows, category, subcategory, domain_base), False
+            fp = fingerprint("|".join(str(v) for v in row) for row in rows)
+            previous = previous_items(fp)
+            if previous is not None:
+                return previous, True
+            with span("parse_network_rows"):
+                items = await run_parse(parse_network_rows, rows, category, subcategory, domain_base)
+            return remember(fp, items)
+        log(f"ℹ️ {subcategory}: no listing payloads captured, falling back to DOM")
+
+    if fingerprints is None:
+        return await scrape_items_to_list(page, category, subcategory, domain_base), False
+
+    log(f"🛒 Scraping items | {subcategory or 'DIRECT'}")
+    if not await wait_for_cards(page):
+        return [], False
+    with span("fingerprint"):
+        fp = fingerprint(await page.evaluate(GRID_FINGERPRINT_JS))
+    previous = previous_items(fp)
+    if previous is not None:
+        await archive_unchanged_async(page.url, "items", category, subcategory)
+        return previous, True
+    with span("content"):
+        html = await page.content()
+    await archive_snapshot_async(page.url, html, "items", category, subcategory)
+    with span("parse_items"):
+        items = await run_parse(parse_items, html, category, subcategory, domain_base)
+    return remember(fp, items)
+
+# ----------------- CONCURRENT CRAWL -----------------
+
+# Pages driven at once per category run. The per-domain politeness cap
+# (domain_slot) lives in ratelimit so listing API calls share it.
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "4"))
+SCRAPE_TIME_BUDGET = float(os.getenv("SCRAPE_TIME_BUDGET", "45"))
+SUBCATEGORY_RETRIES = int(os.getenv("SUBCATEGORY_RETRIES", "2"))
+
+async def detect_category(page):
+    try:
+        cat_el = await page.query_selector('li[data-testid="breadcrumb-item"]:nth-child(2)')
+        return (await cat_el.inner_text()).strip() if cat_el else "General"
+    except:
+        return "General"
+
+async def scrape_subcategory(context, category, sub_name, sub_url, domain_base, retries=SUBCATEGORY_RETRIES,
+                             deadline=None):
+    # Never raises: errors end as "failed", running past `deadline` as "skipped"
+    result = {"name": sub_name, "url": sub_url, "status": "failed", "attempts": 0, "items": [], "reused": False}
+    page = None
+    started = time.perf_counter()
+
+    async def attempts(capture):
+        for attempt in range(1, retries + 1):
+            result["attempts"] = attempt
+            if attempt > 1:
+                inc("retries")
+            if capture is not None:
+                capture.reset()
+            async with domain_slot(sub_url):
+                loaded = await safe_goto(page, sub_url, retries=1)
+            if loaded:
+                result["items"], result["reused"] = await extract_items(page, capture, category, sub_name, domain_base)
+                result["status"] = "ok"
+                return
+
+    try:
+        page = await context.new_page()
+        capture = start_capture(page)
+        # VERCEL SAFETY: a slow navigation can't carry the run past the function's limit
+        await asyncio.wait_for(attempts(capture), deadline - time.time() if deadline else None)
+    except asyncio.TimeoutError:
+        result["status"], result["items"] = "skipped", []
+        result["error"] = "time budget exceeded"
+        log(f"⏱️ Subcategory {sub_name} ran out of time budget")
+    except Exception as e:
+        result["error"] = str(e)
+        log(f"⚠️ Subcategory {sub_name} errored: {e}")
+    finally:
+        observe("subcategory", time.perf_counter() - started)
+        if page is not None:
+            result["traffic"] = page_traffic(page)
+            inc("bytes", result["traffic"]["bytes_loaded"])
+            inc("requests_blocked", result["traffic"]["requests_blocked"])
+            log(f"🚫 {sub_name}: blocked {result['traffic']['requests_blocked']} requests "
+                f"(~{result['traffic']['est_bytes_saved'] // 1024} KB saved)")
+            try:
+                await page.close()
+            except Exception:
+                pass
+    return result
+
+async def iter_subcategories(context, category, subcats, domain_base, concurrency=None, deadline=None):
+    limit = asyncio.Semaphore(max(1, concurrency or SCRAPE_CONCURRENCY))
+    total = len(subcats)
+
+    async def worker(i, sub_name, sub_url):
+        async with limit:
+            # VERCEL SAFETY: don't start new subcategories once the budget is used
+            if deadline and time.time() > deadline:
+                return {"name": sub_name, "url": sub_url, "status": "skipped", "attempts": 0, "items": []}
+            log(f"➡️ [{i}/{total}] Processing: {sub_name}")
+            result = await scrape_subcategory(context, category, sub_name, sub_url, domain_base, deadline=deadline)
+            if result["status"] == "ok":
+                log(f"✅ Extracted {len(result['items'])} items from {sub_name}")
+            else:
+                log(f"❌ Failed subcategory: {sub_name} after {result['attempts']} attempts")
+            return result
+
+    tasks = [asyncio.ensure_future(worker(i, n, u)) for i, (n, u) in enumerate(subcats, 1)]
+    try:
+        # Yield in input order so merged output is deterministic
+        for task in tasks:
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def crawl_subcategories(context, category, subcats, domain_base, concurrency=None, deadline=None):
+    return [
+        result async for result in
+        iter_subcategories(context, category, subcats, domain_base, concurrency=concurrency, deadline=deadline)
+    ]
+
+async def open_category(context, target_url):
+    # Loads the category page once: -> {"status", "category", "subcategories", "direct_items"}
+    parsed_uri = urlparse(target_url)
+    domain_base = f"{parsed_uri.scheme}://{parsed_uri.netloc}"
+    info = {"status": "failed", "category": None, "subcategories": [], "direct_items": None}
+
+    page = await context.new_page()
+    capture = start_capture(page)
+    try:
+        async with domain_slot(target_url):
+            with span("category_page"):
+                loaded = await safe_goto(page, target_url)
+        if not loaded:
+            log("❌ FAILED to load Main URL")
+            return info
+        log("📖 Main Page Loaded")
+        info["status"] = "ok"
+        info["category"] = await detect_category(page)
+
+        info["subcategories"] = await extract_subcategories(page, domain_base)
+        log(f"📂 Found {len(info['subcategories'])} subcategories")
+        if not info["subcategories"]:
+            log("➡️ Scraping main page directly")
+            info["direct_items"], _ = await extract_items(page, capture, info["category"], "DIRECT", domain_base)
+    finally:
+        await page.close()
+    return info
+
+async def iter_category(context, target_url, concurrency=None, deadline=None):
+    # Async generator of {"type": "category"} then one {"type": "batch"} per subcategory
+    parsed_uri = urlparse(target_url)
+    domain_base = f"{parsed_uri.scheme}://{parsed_uri.netloc}"
+
+    info = await open_category(context, target_url)
+    yield {
+        "type": "category", "url": target_url, "status": info["status"],
+        "category": info["category"], "subcategories": len(info["subcategories"]),
+    }
+    if info["status"] != "ok":
+        return
+
+    if info["direct_items"] is not None:
+        yield {
+            "type": "batch", "name": "DIRECT", "url": target_url, "status": "ok",
+            "attempts": 1, "items": info["direct_items"],
+        }
+        return
+
+    async for result in iter_subcategories(
+        context, info["category"], info["subcategories"], domain_base,
+        concurrency=concurrency, deadline=deadline
+    ):
+        yield {"type": "batch", **result}
+
+async def scrape_category(context, target_url, concurrency=None, deadline=None):
+    report = {"url": target_url, "category": None, "status": "failed", "subcategories": []}
+    async for event in iter_category(context, target_url, concurrency=concurrency, deadline=deadline):
+        if event["type"] == "category":
+            report["category"], report["status"] = event["category"], event["status"]
+        else:
+            event.pop("type")
+            report["subcategories"].append(event)
+    return report
+
 # ----------------- MAIN ORCHESTRATOR -----------------
 
-async def run_carrefour_scraper(target_url: str):
+async def iter_carrefour_scraper(target_url: str, concurrency: int = None):
+    # Streams category/batch events and always finishes with a "summary" event
     log("🚀 Starting Hybrid BS4 Scraper Orchestrator")
     start_time = time.time()
-    
-    parsed_uri = urlparse(target_url)
-    domain_base = f"{parsed_uri.scheme}://{parsed_uri.netloc}"
-    
-    browser_token = os.getenv("BROWSERLESS_TOKEN")
-    if not browser_token:
+    run = start_run()
+    start_loop_lag_monitor()
+
+    if browser_pool.mode != "local" and not os.getenv("BROWSERLESS_TOKEN"):
         raise Exception("BROWSERLESS_TOKEN is not set")
 
-    all_data = []
+    summary = {"type": "summary", "status": "success", "category": None, "total_items": 0,
+               "subcategories": {}, "failed": [], "elapsed": 0.0, "pages_parsed": 0, "pages_skipped": 0,
+               "traffic": {"requests_allowed": 0, "requests_blocked": 0, "bytes_loaded": 0, "responses_unsized": 0,
+                           "est_bytes_saved": 0}}
+    try:
+        async with browser_pool.context() as context:
+            async for event in iter_category(
+                context, target_url, concurrency=concurrency, deadline=start_time + SCRAPE_TIME_BUDGET
+            ):
+                if event["type"] == "category":
+                    summary["category"] = event["category"]
+                    if event["status"] != "ok":
+                        summary["status"] = "failed"
+                else:
+                    counts = summary["subcategories"]
+                    counts[event["status"]] = counts.get(event["status"], 0) + 1
+                    summary["total_items"] += len(event["items"])
+                    inc("items", len(event["items"]))
+                    if event["status"] != "ok":
+                        summary["failed"].append(event["name"])
+                    for key, value in event.get("traffic", {}).items():
+                        if key in summary["traffic"]:
+                            summary["traffic"][key] += value
+                    if event["status"] == "ok":
+                        summary["pages_skipped" if event.get("reused") else "pages_parsed"] += 1
+                        # Threads, not run_parse: a process pool would update a copy of the index
+                        await asyncio.to_thread(record_scrape, event["items"])
+                        await asyncio.to_thread(index_scrape, event["items"])
+                yield event
+    except Exception as e:
+        log(f"💥 CRITICAL ERROR: {str(e)}")
+        summary["status"] = "error"
+        summary["error"] = str(e)
 
-    async with async_playwright() as p:
-        connection_url = (
-            f"wss://chrome.browserless.io?token={browser_token}"
-            f"&--disable-http2" 
-            f"&--disable-blink-features=AutomationControlled"
-            f"&stealth=true"
-            f"&--location=asia"
-            f"&timeout=50000"
-        )
+    if summary["failed"]:
+        log(f"⚠️ Incomplete subcategories: {', '.join(summary['failed'])}")
+    summary["elapsed"] = round(time.time() - start_time, 3)
+    observe("scrape_total", summary["elapsed"])
+    summary["metrics"] = end_run(run)
+    log(f"🏁 Finished. Total items: {summary['total_items']}")
+    yield summary
 
-        try:
-            browser = await p.chromium.connect_over_cdp(connection_url)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
-            )
-            page = await context.new_page()
-
-            if await safe_goto(page, target_url):
-                log("📖 Main Page Loaded")
-                
-                # Category detection
-                try:
-                    cat_el = await page.query_selector('li[data-testid="breadcrumb-item"]:nth-child(2)')
-                    category = (await cat_el.inner_text()).strip() if cat_el else "General"
-                except:
-                    category = "General"
-
-                subcats = await extract_subcategories(page, domain_base)
-                log(f"📂 Found {len(subcats)} subcategories")
-
-                if subcats:
-                    for i, (sub_name, sub_url) in enumerate(subcats, 1):
-                        # VERCEL SAFETY: If we've used 45 seconds, wrap up
-                        if time.time() - start_time > 45:
-                            log("⏳ Time limit approaching, returning current items")
-                            break
-
-                        log(f"➡️ [{i}/{len(subcats)}] Processing: {sub_name}")
-                        if await safe_goto(page, sub_url):
-                            data = await scrape_items_to_list(page, category, sub_name, domain_base)
-                            all_data.extend(data)
-                            log(f"✅ Extracted {len(data)} items")
-                else:
-                    log("➡️ Scraping main page directly")
-                    data = await scrape_items_to_list(page, category, "DIRECT", domain_base)
-                    all_data.extend(data)
+async def scrape_carrefour(target_url: str, concurrency: int = None):
+    # -> (items, summary event)
+    all_data, summary = [], None
+    async for event in iter_carrefour_scraper(target_url, concurrency=concurrency):
+        if event["type"] == "batch":
+            all_data.extend(event["items"])
+        elif event["type"] == "summary":
+            summary = event
+    return all_data, summary
 
-        except Exception as e:
-            log(f"💥 CRITICAL ERROR: {str(e)}")
-        finally:
-            await browser.close()
-            
-    log(f"🏁 Finished. Total items: {len(all_data)}")
-    return all_data
\ No newline at end of file
+async def run_carrefour_scraper(target_url: str, concurrency: int = None):
+    all_data, _ = await scrape_carrefour(target_url, concurrency=concurrency)
+    return all_data
@@ -0,0 +1,97 @@
+import os
+from urllib.parse import urlparse
+from weakref import WeakKeyDictionary
+
+# ----------------- CONFIG -----------------
+
+def _env_list(name, default):
+    return [v.strip() for v in os.getenv(name, default).split(",") if v.strip()]
+
+BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES", "1") == "1"
+# Stylesheets load by default: the fingerprint and extraction read innerText,
+# which depends on CSS layout and visibility
+BLOCKED_RESOURCE_TYPES = set(_env_list("BLOCKED_RESOURCE_TYPES", "image,media,font"))
+BLOCKED_DOMAINS = _env_list(
+    "BLOCKED_DOMAINS",
+    "google-analytics.com,googletagmanager.com,doubleclick.net,googleadservices.com,"
+    "facebook.net,facebook.com,connect.facebook.net,hotjar.com,clarity.ms,tiktok.com,"
+    "snapchat.com,criteo.com,criteo.net,bat.bing.com,nr-data.net,newrelic.com,"
+    "appsflyer.com,branch.io,segment.io,mixpanel.com,adjust.com",
+)
+# URL substrings that are never blocked, whatever their type or domain
+ALLOWED_URL_PATTERNS = _env_list("ALLOWED_URL_PATTERNS", "")
+
+# Rough transfer sizes used to estimate what an aborted request would have cost
+ESTIMATED_BYTES = {"image": 40_000, "media": 400_000, "font": 35_000, "stylesheet": 30_000, "script": 60_000}
+DEFAULT_ESTIMATED_BYTES = 5_000
+
+# ----------------- RULES -----------------
+
+def _domain_blocked(host):
+    return any(host == d or host.endswith("." + d) for d in BLOCKED_DOMAINS)
+
+def block_reason(url, resource_type):
+    # -> None when the request may go through, else "type" or "domain"
+    if any(p in url for p in ALLOWED_URL_PATTERNS):
+        return None
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return "type"
+    if _domain_blocked(urlparse(url).hostname or ""):
+        return "domain"
+    return None
+
+# ----------------- COUNTERS -----------------
+
+def _new_counters():
+    return {
+        "requests_allowed": 0,
+        "requests_blocked": 0,
+        "blocked_by_type": {},
+        # Sum of content-length headers only: a lower bound, since chunked and
+        # many compressed responses omit it (those are counted in responses_unsized)
+        "bytes_loaded": 0,
+        "responses_unsized": 0,
+        "est_bytes_saved": 0,
+    }
+
+_page_traffic = WeakKeyDictionary()
+
+def page_traffic(page):
+    counters = _page_traffic.get(page)
+    if counters is None:
+        counters = _page_traffic[page] = _new_counters()
+    return counters
+
+def _on_response(page):
+    def handler(response):
+        counters = page_traffic(page)
+        try:
+            counters["bytes_loaded"] += int(response.headers["content-length"])
+        except (KeyError, ValueError):
+            counters["responses_unsized"] += 1
+    return handler
+
+# ----------------- ROUTING -----------------
+
+async def _route_handler(route):
+    request = route.request
+    resource_type = request.resource_type
+    try:
+        counters = page_traffic(request.frame.page)
+    except Exception:
+        # Service worker / detached frame requests have no page
+        counters = _new_counters()
+
+    if block_reason(request.url, resource_type):
+        counters["requests_blocked"] += 1
+        by_type = counters["blocked_by_type"]
+        by_type[resource_type] = by_type.get(resource_type, 0) + 1
+        counters["est_bytes_saved"] += ESTIMATED_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+        await route.abort("blockedbyclient")
+    else:
+        counters["requests_allowed"] += 1
+        await route.continue_()
+
+async def install_resource_blocking(context):
+    await context.route("**/*", _route_handler)
+    context.on("page", lambda page: page.on("response", _on_response(page)))
@@ -0,0 +1,229 @@
+import asyncio
+import os
+import re
+import time
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+from api.services.helper.ratelimit import rate_limiter, domain_slot
+
+# ----------------- CONFIG -----------------
+
+# "dom" (default) parses the rendered product grid. "network" reads the
+# storefront's own product-listing JSON, falling back to the DOM parser when
+# nothing usable was captured; keep it opt-in until bench/run_bench.py has
+# recorded payloads to check it against (bench/record_snapshots.py saves them).
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "dom")
+LISTING_URL_PATTERN = re.compile(os.getenv("LISTING_URL_PATTERN", r"/api/.*(product|search|categor|listing|plp)"), re.I)
+NETWORK_WAIT = float(os.getenv("NETWORK_WAIT", "3"))
+NETWORK_MAX_PAGES = int(os.getenv("NETWORK_MAX_PAGES", "20"))
+
+NAME_KEYS = ("name", "productName", "displayName", "title")
+PRICE_KEYS = ("price", "salePrice", "sellingPrice", "finalPrice", "value")
+URL_KEYS = ("url", "productUrl", "href", "link", "pdpUrl")
+SIZE_KEYS = ("size", "packSize", "unitOfMeasure", "weight", "netContent")
+PAGE_KEYS = (("currentPage", "totalPages"), ("currentPage", "numOfPages"), ("pageNumber", "numOfPages"),
+             ("page", "totalPages"), ("page", "pages"))
+
+def log(msg):
+    print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
+
+# ----------------- PAYLOAD PARSING -----------------
+
+def _first(d, keys):
+    for key in keys:
+        value = d.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+def _price_value(value):
+    # price may be 150, "1,250.00" or {"price": 150, "discount": {"price": 120}}
+    if isinstance(value, dict):
+        discount = value.get("discount")
+        if isinstance(discount, dict) and discount.get("price") is not None:
+            return _price_value(discount.get("price"))
+        return _price_value(_first(value, PRICE_KEYS + ("formattedValue", "amount")))
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        cleaned = re.sub(r'[^\d.]', '', value.replace(',', ''))
+        try:
+            return float(cleaned)
+        except ValueError:
+            return None
+    return None
+
+def _url_value(value):
+    if isinstance(value, dict):
+        return _url_value(_first(value, URL_KEYS))
+    return value if isinstance(value, str) else None
+
+def _looks_like_product(d):
+    return isinstance(d, dict) and _first(d, NAME_KEYS) is not None and _first(d, PRICE_KEYS) is not None
+
+def find_products(payload, depth=0):
+    # First list in the payload whose entries mostly look like products
+    if depth > 6:
+        return None
+    if isinstance(payload, list):
+        if payload and sum(_looks_like_product(p) for p in payload) >= max(1, len(payload) // 2):
+            return payload
+        children = payload
+    elif isinstance(payload, dict):
+        children = payload.values()
+    else:
+        return None
+    for child in children:
+        found = find_products(child, depth + 1)
+        if found:
+            return found
+    return None
+
+def find_pagination(payload, depth=0):
+    # -> (page_param, current, total) or None
+    if not isinstance(payload, dict) or depth > 3:
+        return None
+    for current_key, total_key in PAGE_KEYS:
+        current, total = payload.get(current_key), payload.get(total_key)
+        if isinstance(current, int) and isinstance(total, int):
+            return current_key, current, total
+    for value in payload.values():
+        found = find_pagination(value, depth + 1)
+        if found:
+            return found
+    return None
+
+def parse_listing_payload(payload):
+    # -> [(name, price_val, url, size)] in payload order
+    rows = []
+    for product in find_products(payload) or []:
+        if not _looks_like_product(product):
+            continue
+        price = _price_value(_first(product, PRICE_KEYS))
+        if price is None:
+            continue
+        name = str(_first(product, NAME_KEYS)).strip()
+        url = _url_value(_first(product, URL_KEYS)) or _url_value(product.get("links"))
+        size = _first(product, SIZE_KEYS)
+        rows.append((name, f"{price:.2f}", url, str(size).strip() if size is not None else None))
+    return rows
+
+def page_url(url, param, number):
+    parts = urlparse(url)
+    query = dict(parse_qsl(parts.query))
+    query[param] = str(number)
+    return urlunparse(parts._replace(query=urlencode(query)))
+
+# ----------------- CAPTURE -----------------
+
+class ResponseCapture:
+    def __init__(self, page):
+        self.page = page
+        self.payloads = []  # [(url, payload)]
+        self._tasks = set()
+        self._found = asyncio.Event()
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        if response.request.resource_type not in ("xhr", "fetch"):
+            return
+        if not LISTING_URL_PATTERN.search(response.url):
+            return
+        if "json" not in response.headers.get("content-type", ""):
+            return
+        task = asyncio.ensure_future(self._read(response))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _read(self, response):
+        try:
+            payload = await response.json()
+        except Exception:
+            return
+        if find_products(payload):
+            self.payloads.append((response.url, payload))
+            self._found.set()
+
+    def reset(self):
+        # Reads still pending from the previous attempt would land in the new list
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = set()
+        self.payloads = []
+        self._found = asyncio.Event()
+
+    async def wait(self, timeout=NETWORK_WAIT):
+        try:
+            await asyncio.wait_for(self._found.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def _embedded_payload(self):
+        # Server-rendered listings ship the same JSON inline (Next.js page data)
+        try:
+            payload = await self.page.evaluate("() => window.__NEXT_DATA__ || null")
+        except Exception:
+            return
+        if payload and find_products(payload):
+            self.payloads.append((self.page.url, payload))
+
+    async def rows(self, context):
+        await self.wait()
+        if not self.payloads:
+            await self._embedded_payload()
+        rows, seen_urls = [], set()
+        for url, payload in list(self.payloads):
+            if url in seen_urls:
+                continue
+            seen_urls.add(url)
+            rows.extend(parse_listing_payload(payload))
+            rows.extend(await self._follow_pages(context, url, payload, seen_urls))
+        # The same product can show up in several listing calls
+        unique, seen_products = [], set()
+        for row in rows:
+            key = row[2] or row[0]
+            if key not in seen_products:
+                seen_products.add(key)
+                unique.append(row)
+        return unique
+
+    async def _follow_pages(self, context, url, payload, seen_urls):
+        # Fetch the remaining listing pages straight from the API, no navigation
+        pagination = find_pagination(payload)
+        if not pagination:
+            return []
+        param, current, total = pagination
+        # Zero-based APIs report page 0 of N, one-based ones page 1 of N
+        last = total - 1 if current == 0 else total
+        rows = []
+        for number in range(current + 1, min(last, current + NETWORK_MAX_PAGES) + 1):
+            next_url = page_url(url, param, number)
+            if next_url in seen_urls:
+                continue
+            seen_urls.add(next_url)
+            # Same pacing and politeness cap as page navigations
+            async with domain_slot(next_url):
+                await rate_limiter.acquire(next_url)
+                try:
+                    response = await context.request.get(next_url)
+                except Exception as e:
+                    if "Timeout" in type(e).__name__:
+                        rate_limiter.report(next_url, "timeout")
+                    log(f"⚠️ Listing page {number} failed: {e}")
+                    break
+            if response.status in (403, 429, 503):
+                rate_limiter.report(next_url, "blocked")
+                break
+            rate_limiter.report(next_url, "ok")
+            if not response.ok:
+                break
+            try:
+                page_rows = parse_listing_payload(await response.json())
+            except Exception as e:
+                log(f"⚠️ Listing page {number} failed: {e}")
+                break
+            if not page_rows:
+                break
+            rows.extend(page_rows)
+        return rows
@@ -0,0 +1,128 @@
+import re
+from functools import lru_cache
+
+# ----------------- PATTERNS -----------------
+
+PRICE_JUNK = re.compile(r'[^\d.]')
+
+# Patterns for: "pack of 12", "12 pcs", "12 units", "12x200ml", "200mlx12", "12 x 1l".
+# Order matters: the first pattern that matches anywhere wins.
+PACK_PATTERNS = [
+    r'pack of\s*(\d+)',                 # "pack of 12"
+    r'(\d+)\s*pcs',                     # "12 pcs" or "12pcs"
+    r'(\d+)\s*units',                   # "12 units"
+    r'(\d+)\s*packs',                   # "12 packs"
+    r'x\s*(\d+)(?!\s*[a-z])',           # "x 12" (not followed by a unit like x 12g)
+    r'(?<![0-9])(\d+)\s*x\s*(?![0-9])', # "12 x" (standalone x)
+    r'(\d+)\s*x\s*\d+\s*[a-z]+',        # "12 x 200ml"
+    r'\d+\s*[a-z]+\s*x\s*(\d+)'         # "200ml x 12"
+]
+
+# Compiled once; a combined alternation/lookahead matcher was measured slower
+# than searching these in order with CPython's re.
+PACK_RES = [re.compile(p) for p in PACK_PATTERNS]
+
+WEIGHT = re.compile(r'(\d+(?:\.\d+)?)\s*(g|gm|grams|kg|ml|l|liter|litre|lt)')
+WEIGHT_V1 = re.compile(r'(\d+(?:\.\d+)?)\s*([a-zA-Z]+)')
+
+MEMO_SIZE = 8192
+
+# ----------------- RULES -----------------
+# A rule is (divisor, factor, unit): base price = (price / divisor) * factor.
+# Dividing by 1.0 and multiplying by 1.0 are exact, so rules reproduce the
+# original per-branch arithmetic bit for bit.
+
+NO_RULE = (1.0, 1.0, "Unit")
+
+@lru_cache(maxsize=MEMO_SIZE)
+def parse_price(price_str):
+    # Returns None when the string holds no usable number
+    try:
+        return float(PRICE_JUNK.sub('', price_str.replace(',', '')))
+    except (ValueError, AttributeError):
+        return None
+
+@lru_cache(maxsize=MEMO_SIZE)
+def quantity_rule(search_text):
+    # 2. Extract Multiplier (Pack Size)
+    for pattern in PACK_RES:
+        match = pattern.search(search_text)
+        if match:
+            multiplier = float(match.group(1))
+            # If it's a multi-pack, calculate price per single item in that pack
+            if multiplier > 1:
+                return (multiplier, 1.0, "1 Unit")
+            break
+
+    # 3. Standard Weight/Volume Normalization (Only if no pack multiplier was found)
+    weight_match = WEIGHT.search(search_text)
+    if weight_match:
+        value = float(weight_match.group(1))
+        unit = weight_match.group(2)
+        if value > 0:
+            if unit in ['g', 'gm', 'grams']:
+                return (value, 1000.0, "1 KG")
+            elif unit in ['ml', 'milliliter']:
+                return (value, 1000.0, "1 Litre")
+            elif unit in ['kg', 'l', 'liter', 'litre', 'lt']:
+                # Already in base unit (1kg or 1L)
+                return (value, 1.0, f"1 {unit.upper().replace('LT', 'L')[:1]}")
+
+    # Default fallback
+    return NO_RULE
+
+def normalize_to_bulk_price(price_str, unit_qty_str, item_name=""):
+    # 1. Clean the price (remove commas and currency markers)
+    price = parse_price(price_str)
+    if price is None:
+        return 0.0, "Unit"
+    # Combine name and qty string to catch all variations
+    divisor, factor, unit = quantity_rule(f"{item_name} {unit_qty_str}".lower())
+    return (price / divisor) * factor, unit
+
+def normalize_batch(prices, unit_qtys, item_names=None):
+    # Vectorised normalize_to_bulk_price over a list/column of (price, qty text) pairs.
+    # Returns (float64 base prices, object array of base units).
+    import numpy as np
+
+    n = len(prices)
+    if item_names is None:
+        item_names = [""] * n
+    values = np.empty(n, dtype=np.float64)
+    divisors = np.empty(n, dtype=np.float64)
+    factors = np.empty(n, dtype=np.float64)
+    units = np.empty(n, dtype=object)
+    for i, (price_str, qty, name) in enumerate(zip(prices, unit_qtys, item_names)):
+        price = parse_price(price_str)
+        if price is None:
+            values[i], (divisors[i], factors[i], units[i]) = 0.0, NO_RULE
+            continue
+        values[i] = price
+        divisors[i], factors[i], units[i] = quantity_rule(f"{name} {qty}".lower())
+    return (values / divisors) * factors, units
+
+# ----------------- LEGACY (v1) -----------------
+
+@lru_cache(maxsize=MEMO_SIZE)
+def quantity_rule_v1(unit_qty_text):
+    match = WEIGHT_V1.search(unit_qty_text)
+    if not match:
+        return None
+    return float(match.group(1)), match.group(2)
+
+def normalize_to_bulk_price_v1(price_str, unit_qty_str):
+    try:
+        price = float(PRICE_JUNK.sub('', price_str))
+        rule = quantity_rule_v1(unit_qty_str.lower())
+        if rule is None:
+            return price, "Unit"
+        value, unit = rule
+        if unit in ['g', 'gm', 'grams']:
+            return (price / value) * 1000, "KG"
+        elif unit in ['ml', 'milliliter']:
+            return (price / value) * 1000, "Litre"
+        elif unit in ['kg', 'l', 'liter']:
+            return price / value, unit.upper()
+        return price, "Unit"
+    except:
+        return 0.0, "Unknown"
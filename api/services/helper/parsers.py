@@ -0,0 +1,120 @@
+import os
+import re
+
+# ----------------- CONFIG -----------------
+
+# "bs4" is the original BeautifulSoup/html.parser path, "lxml" uses
+# precompiled XPath over lxml.html. tests/test_parsers.py checks both against
+# golden outputs for the pages in bench/snapshots; bs4 stays the default until
+# those pages are live captures (bench/record_snapshots.py) with reviewed goldens.
+HTML_PARSER = os.getenv("HTML_PARSER", "bs4")
+
+SUBCATEGORY_HREF = re.compile(r'^/mafpak/en/c/')
+PRODUCT_HREF = re.compile(r'/p/')
+
+# ----------------- BEAUTIFULSOUP -----------------
+
+class BS4Parser:
+    name = "bs4"
+
+    def subcategory_links(self, html):
+        # -> [(name, href)]
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        links = []
+        for link in soup.find_all('a', href=SUBCATEGORY_HREF):
+            name_el = link.find("div", class_="text-primary")
+            if name_el:
+                links.append((name_el.get_text(strip=True), link.get('href')))
+        return links
+
+    def cards(self, html):
+        # -> [(name, price_main, price_decimal, href)], None where the element is missing
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        rows = []
+        for card in soup.find_all('div', class_=lambda x: x and 'relative w-[134px]' in x):
+            name_el = card.find('div', class_=lambda x: x and 'line-clamp-2' in x)
+            p_main = card.find('div', class_=lambda x: x and 'text-lg' in x and 'font-bold' in x)
+            p_dec = card.find('div', class_=lambda x: x and 'text-2xs' in x and 'font-bold' in x)
+            link_el = card.find('a', href=PRODUCT_HREF)
+            rows.append((
+                name_el.get_text(strip=True) if name_el else None,
+                p_main.get_text(strip=True) if p_main else None,
+                p_dec.get_text(strip=True) if p_dec else None,
+                link_el['href'] if link_el else None,
+            ))
+        return rows
+
+# ----------------- LXML -----------------
+
+class LxmlParser:
+    name = "lxml"
+
+    def __init__(self):
+        from lxml import etree, html as lxml_html
+        self._fromstring = lxml_html.document_fromstring
+        # normalize-space(@class) matches BeautifulSoup's joined class string
+        cls = 'normalize-space(@class)'
+        self._subcat_links = etree.XPath('//a[starts-with(@href, "/mafpak/en/c/")]')
+        self._subcat_name = etree.XPath(f'(.//div[contains(concat(" ", {cls}, " "), " text-primary ")])[1]')
+        self._cards = etree.XPath(f'//div[contains({cls}, "relative w-[134px]")]')
+        self._card_name = etree.XPath(f'(.//div[contains({cls}, "line-clamp-2")])[1]')
+        self._card_main = etree.XPath(f'(.//div[contains({cls}, "text-lg") and contains({cls}, "font-bold")])[1]')
+        self._card_dec = etree.XPath(f'(.//div[contains({cls}, "text-2xs") and contains({cls}, "font-bold")])[1]')
+        self._card_link = etree.XPath('(.//a[contains(@href, "/p/")])[1]')
+        self._texts = etree.XPath('.//text()')
+
+    def _text(self, el):
+        return "".join(t.strip() for t in self._texts(el))
+
+    def _first_text(self, xpath, root):
+        found = xpath(root)
+        return self._text(found[0]) if found else None
+
+    def _parse(self, html):
+        if not html or not html.strip():
+            return None
+        return self._fromstring(html)
+
+    def subcategory_links(self, html):
+        root = self._parse(html)
+        if root is None:
+            return []
+        links = []
+        for link in self._subcat_links(root):
+            name = self._first_text(self._subcat_name, link)
+            if name is not None:
+                links.append((name, link.get('href')))
+        return links
+
+    def cards(self, html):
+        root = self._parse(html)
+        if root is None:
+            return []
+        rows = []
+        for card in self._cards(root):
+            link = self._card_link(card)
+            rows.append((
+                self._first_text(self._card_name, card),
+                self._first_text(self._card_main, card),
+                self._first_text(self._card_dec, card),
+                link[0].get('href') if link else None,
+            ))
+        return rows
+
+
+PARSERS = {"bs4": BS4Parser, "lxml": LxmlParser}
+_instances = {}
+
+def get_parser(name=None):
+    name = name or HTML_PARSER
+    parser = _instances.get(name)
+    if parser is None:
+        try:
+            parser = PARSERS[name]()
+        except ImportError:
+            # lxml not installed: fall back to the BeautifulSoup backend
+            parser = _instances.get("bs4") or BS4Parser()
+        _instances[name] = parser
+    return parser
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import os
+import time
+from urllib.parse import urlparse
+
+# ----------------- CONFIG -----------------
+
+RATE_STATE_PATH = os.getenv("RATE_STATE_PATH", "/tmp/price-service-ratelimit.json")
+RATE_INITIAL = float(os.getenv("RATE_INITIAL", "0.5"))      # requests/second per domain
+RATE_MIN = float(os.getenv("RATE_MIN", "0.05"))
+RATE_MAX = float(os.getenv("RATE_MAX", "4"))
+RATE_INCREASE = float(os.getenv("RATE_INCREASE", "0.05"))   # additive step per healthy response
+RATE_BLOCK_FACTOR = float(os.getenv("RATE_BLOCK_FACTOR", "0.5"))
+RATE_TIMEOUT_FACTOR = float(os.getenv("RATE_TIMEOUT_FACTOR", "0.75"))
+RATE_BLOCK_COOLDOWN = float(os.getenv("RATE_BLOCK_COOLDOWN", "12"))
+RATE_MAX_COOLDOWN = float(os.getenv("RATE_MAX_COOLDOWN", "60"))
+RATE_BURST = float(os.getenv("RATE_BURST", "2"))
+RATE_SAVE_INTERVAL = 10.0
+# Requests in flight per scraped domain, shared by every run in this process
+SCRAPE_PER_DOMAIN = int(os.getenv("SCRAPE_PER_DOMAIN", "3"))
+# Fraction of the per-domain budget (rate, burst, in-flight cap) this process
+# may use. Parallel scrapers on one IP split it, e.g. fanout sets 1/processes.
+RATE_SHARE = float(os.getenv("RATE_SHARE", "1"))
+
+def log(msg):
+    print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
+
+def domain_of(url):
+    return urlparse(url).netloc or url
+
+# ----------------- LIMITER -----------------
+
+class _DomainState:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.cooldown_until = 0.0
+        self.blocks_in_a_row = 0
+        self.stats = {"ok": 0, "blocked": 0, "timeout": 0}
+
+
+class AdaptiveRateLimiter:
+    # Per-domain token bucket whose refill rate follows AIMD: healthy responses
+    # add RATE_INCREASE, blocks halve it and impose a growing cooldown.
+    def __init__(self, initial_rate=RATE_INITIAL, min_rate=RATE_MIN, max_rate=RATE_MAX,
+                 increase=RATE_INCREASE, block_factor=RATE_BLOCK_FACTOR, timeout_factor=RATE_TIMEOUT_FACTOR,
+                 block_cooldown=RATE_BLOCK_COOLDOWN, max_cooldown=RATE_MAX_COOLDOWN, burst=RATE_BURST,
+                 state_path=RATE_STATE_PATH, share=RATE_SHARE):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.block_factor = block_factor
+        self.timeout_factor = timeout_factor
+        self.block_cooldown = block_cooldown
+        self.max_cooldown = max_cooldown
+        self.burst = burst
+        self.state_path = state_path
+        # Rates stay in whole-domain units (and in the state file); only pacing is scaled
+        self.share = share
+        self._domains = {}
+        self._learned = self._load()
+        self._last_save = time.monotonic()
+
+    def _load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path) as f:
+                return {d: float(r) for d, r in json.load(f).items()}
+        except Exception as e:
+            log(f"⚠️ Ignoring unreadable rate state: {e}")
+            return {}
+
+    def save(self):
+        if not self.state_path:
+            return
+        rates = dict(self._learned)
+        rates.update({d: st.rate for d, st in self._domains.items()})
+        try:
+            tmp = self.state_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(rates, f)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            log(f"⚠️ Could not persist rate state: {e}")
+        self._last_save = time.monotonic()
+
+    def _state(self, domain):
+        st = self._domains.get(domain)
+        if st is None:
+            rate = min(self.max_rate, max(self.min_rate, self._learned.get(domain, self.initial_rate)))
+            st = self._domains[domain] = _DomainState(rate, self.burst)
+        return st
+
+    async def acquire(self, url):
+        st = self._state(domain_of(url))
+        burst = max(1.0, self.burst * self.share)
+        while True:
+            now = time.monotonic()
+            if now < st.cooldown_until:
+                await asyncio.sleep(st.cooldown_until - now)
+                continue
+            rate = st.rate * self.share
+            st.tokens = min(burst, st.tokens + (now - st.updated) * rate)
+            st.updated = now
+            if st.tokens >= 1:
+                st.tokens -= 1
+                return
+            await asyncio.sleep((1 - st.tokens) / rate)
+
+    def report(self, url, outcome):
+        # outcome: "ok", "blocked" or "timeout"
+        domain = domain_of(url)
+        st = self._state(domain)
+        st.stats[outcome] = st.stats.get(outcome, 0) + 1
+        if outcome == "ok":
+            st.blocks_in_a_row = 0
+            st.rate = min(self.max_rate, st.rate + self.increase)
+        elif outcome == "blocked":
+            st.blocks_in_a_row += 1
+            st.rate = max(self.min_rate, st.rate * self.block_factor)
+            st.tokens = 0
+            cooldown = min(self.max_cooldown, self.block_cooldown * 2 ** (st.blocks_in_a_row - 1))
+            st.cooldown_until = time.monotonic() + cooldown
+            log(f"🐢 {domain}: blocked, rate → {st.rate:.2f}/s, cooling down {cooldown:.0f}s")
+        elif outcome == "timeout":
+            st.rate = max(self.min_rate, st.rate * self.timeout_factor)
+        if time.monotonic() - self._last_save > RATE_SAVE_INTERVAL:
+            self.save()
+
+    def snapshot(self):
+        return {
+            d: {"rate": round(st.rate, 3), "cooling_down": st.cooldown_until > time.monotonic(), **st.stats}
+            for d, st in self._domains.items()
+        }
+
+
+rate_limiter = AdaptiveRateLimiter()
+
+_domain_slots = {}
+
+def domain_slot(url):
+    netloc = domain_of(url)
+    slot = _domain_slots.get(netloc)
+    if slot is None:
+        cap = max(1, round(SCRAPE_PER_DOMAIN * rate_limiter.share))
+        slot = _domain_slots[netloc] = asyncio.Semaphore(cap)
+    return slot
+
+def set_rate_share(share):
+    # Call before the first request; slots already handed out keep their size
+    rate_limiter.share = share
+    _domain_slots.clear()
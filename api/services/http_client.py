@@ -0,0 +1,81 @@
+import asyncio
+import os
+from urllib.parse import urlparse
+import httpx
+
+# ----------------- CONFIG -----------------
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "6"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    # httpx decodes br transparently when the brotli package is installed
+    "Accept-Encoding": "gzip, deflate, br",
+}
+
+# ----------------- ENGINE -----------------
+
+class FetchEngine:
+    # Generic HTTP fetches for arbitrary shop URLs: pooled connections and a
+    # per-host semaphore. The scraper's AIMD limiter is opt-in per call
+    # (limiter=rate_limiter) so Carrefour block handling never throttles
+    # unrelated hosts.
+    def __init__(self, per_host_limit=None):
+        self.per_host_limit = per_host_limit or HTTP_PER_HOST_LIMIT
+        self._client = None
+        self._host_slots = {}
+
+    def _make_client(self):
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        return httpx.AsyncClient(
+            http2=http2,
+            headers=DEFAULT_HEADERS,
+            follow_redirects=True,
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            ),
+        )
+
+    @property
+    def client(self):
+        if self._client is None or self._client.is_closed:
+            self._client = self._make_client()
+        return self._client
+
+    def host_slot(self, url):
+        host = urlparse(url).netloc
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        return slot
+
+    async def get(self, url, limiter=None, **kwargs):
+        async with self.host_slot(url):
+            if limiter is None:
+                return await self.client.get(url, **kwargs)
+            await limiter.acquire(url)
+            try:
+                response = await self.client.get(url, **kwargs)
+            except httpx.TimeoutException:
+                limiter.report(url, "timeout")
+                raise
+            limiter.report(url, "blocked" if response.status_code in (403, 429, 503) else "ok")
+            return response
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+fetch_engine = FetchEngine()
@@ -0,0 +1,184 @@
+import csv
+import io
+import json
+import math
+from array import array
+
+# ----------------- SCHEMA -----------------
+
+# Output order of the scraper's item dicts; the JSON shape stays exactly this
+FIELDS = ("Category", "Subcategory", "Item_Name", "Price", "Currency", "Big_Qty",
+          "Unit_Qty", "Base_Unit_Price", "Base_Unit", "Item_URL")
+# Few distinct values repeated on every row: stored once, referenced by code
+CATEGORICAL = ("Category", "Subcategory", "Currency", "Base_Unit")
+NUMERIC = ("Price", "Base_Unit_Price")
+TEXT = ("Item_Name", "Big_Qty", "Unit_Qty", "Item_URL")
+
+EXPORT_FORMATS = {
+    "json": "application/json",
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def _to_float(value):
+    try:
+        return float(str(value).replace(",", ""))
+    except (TypeError, ValueError):
+        return math.nan
+
+# ----------------- BATCH -----------------
+
+class ItemBatch:
+    # Columnar store for scraped items: categorical fields as array('i') codes
+    # into interned value lists, prices as array('d'), text as plain lists.
+    # Prices whose string form isn't "%.2f" keep their original text in
+    # `_raw` so to_dicts() round-trips exactly.
+    __slots__ = ("_codes", "_values", "_lookup", "_numbers", "_raw", "_text", "_len")
+
+    def __init__(self):
+        self._codes = {f: array("i") for f in CATEGORICAL}
+        self._values = {f: [] for f in CATEGORICAL}
+        self._lookup = {f: {} for f in CATEGORICAL}
+        self._numbers = {f: array("d") for f in NUMERIC}
+        self._raw = {f: {} for f in NUMERIC}  # field -> {row: original string}
+        self._text = {f: [] for f in TEXT}
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    @classmethod
+    def from_dicts(cls, items):
+        batch = cls()
+        batch.extend(items)
+        return batch
+
+    def _code(self, field, value):
+        lookup = self._lookup[field]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self._values[field])
+            self._values[field].append(value)
+        return code
+
+    def append(self, item):
+        row = self._len
+        for f in CATEGORICAL:
+            self._codes[f].append(self._code(f, item.get(f)))
+        for f in NUMERIC:
+            raw = item.get(f)
+            number = _to_float(raw)
+            self._numbers[f].append(number)
+            if math.isnan(number) or raw != f"{number:.2f}":
+                self._raw[f][row] = raw
+        for f in TEXT:
+            self._text[f].append(item.get(f))
+        self._len += 1
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def column(self, field):
+        if field in CATEGORICAL:
+            values = self._values[field]
+            return [values[c] for c in self._codes[field]]
+        if field in NUMERIC:
+            return self._numbers[field]
+        return self._text[field]
+
+    # ----------------- ROW VIEW -----------------
+
+    def _formatted(self, field):
+        raw = self._raw[field]
+        return [raw[i] if i in raw else f"{n:.2f}" for i, n in enumerate(self._numbers[field])]
+
+    def to_dicts(self):
+        columns = [
+            self._formatted(f) if f in NUMERIC else self.column(f)
+            for f in FIELDS
+        ]
+        return [dict(zip(FIELDS, row)) for row in zip(*columns)]
+
+    # ----------------- SERIALIZATION -----------------
+
+    def to_columns(self):
+        # JSON-safe columnar form (used for cache entries); from_columns() restores it
+        return {
+            "n": self._len,
+            "categorical": {f: {"values": self._values[f], "codes": list(self._codes[f])} for f in CATEGORICAL},
+            "numeric": {f: [None if math.isnan(n) else n for n in self._numbers[f]] for f in NUMERIC},
+            "raw": {f: {str(i): v for i, v in self._raw[f].items()} for f in NUMERIC},
+            "text": self._text,
+        }
+
+    @classmethod
+    def from_columns(cls, data):
+        batch = cls()
+        batch._len = data["n"]
+        for f in CATEGORICAL:
+            batch._values[f] = list(data["categorical"][f]["values"])
+            batch._lookup[f] = {v: i for i, v in enumerate(batch._values[f])}
+            batch._codes[f] = array("i", data["categorical"][f]["codes"])
+        for f in NUMERIC:
+            batch._numbers[f] = array("d", (math.nan if n is None else n for n in data["numeric"][f]))
+            batch._raw[f] = {int(i): v for i, v in data["raw"][f].items()}
+        batch._text = {f: list(data["text"][f]) for f in TEXT}
+        return batch
+
+    def to_json(self, **envelope):
+        # Serialized straight to bytes; skips FastAPI's per-field encoder
+        return json.dumps({**envelope, "data": self.to_dicts()}, separators=(",", ":")).encode("utf-8")
+
+    def to_csv(self):
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(FIELDS)
+        columns = [self._formatted(f) if f in NUMERIC else self.column(f) for f in FIELDS]
+        writer.writerows(zip(*columns))
+        return out.getvalue().encode("utf-8")
+
+    def to_arrow(self):
+        # pyarrow is optional; raises ImportError when it isn't installed
+        import pyarrow as pa
+
+        arrays = []
+        for f in FIELDS:
+            if f in CATEGORICAL:
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(self._codes[f], type=pa.int32()), pa.array(self._values[f], type=pa.string())
+                ))
+            elif f in NUMERIC:
+                arrays.append(pa.array(self._numbers[f], type=pa.float64(), from_pandas=True))
+            else:
+                arrays.append(pa.array(self._text[f], type=pa.string()))
+        return pa.Table.from_arrays(arrays, names=list(FIELDS))
+
+    def to_arrow_ipc(self):
+        import pyarrow as pa
+
+        table = self.to_arrow()
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def to_parquet(self):
+        import pyarrow.parquet as pq
+
+        sink = io.BytesIO()
+        pq.write_table(self.to_arrow(), sink, compression="zstd")
+        return sink.getvalue()
+
+    def export(self, fmt, **envelope):
+        # -> bytes in one of EXPORT_FORMATS; `envelope` only applies to JSON
+        if fmt == "json":
+            return self.to_json(**envelope)
+        if fmt == "csv":
+            return self.to_csv()
+        if fmt == "arrow":
+            return self.to_arrow_ipc()
+        if fmt == "parquet":
+            return self.to_parquet()
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
@@ -0,0 +1,285 @@
+import asyncio
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+from api.services.price_history import record_scrape
+from api.services.search import index_scrape
+
+# ----------------- CONFIG -----------------
+
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "/tmp/price-service-jobs.sqlite3")
+# Each worker invocation stops picking up new work after this many seconds
+# (keeps a run inside Vercel's maxDuration); the next one resumes.
+JOB_TIME_BUDGET = float(os.getenv("JOB_TIME_BUDGET", "45"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+CATEGORY_CSV = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "Category.csv")
+
+def log(msg):
+    print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
+
+def load_category_urls(path=CATEGORY_CSV):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row["url"].strip() for row in csv.DictReader(f) if row.get("url", "").strip()]
+
+# ----------------- STORE -----------------
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at REAL NOT NULL,
+    updated_at REAL NOT NULL, runs INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS job_targets (
+    job_id TEXT NOT NULL, idx INTEGER NOT NULL, url TEXT NOT NULL, category TEXT,
+    status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE TABLE IF NOT EXISTS job_subcategories (
+    job_id TEXT NOT NULL, target_idx INTEGER NOT NULL, idx INTEGER NOT NULL,
+    name TEXT NOT NULL, url TEXT NOT NULL, status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0, items TEXT, item_count INTEGER NOT NULL DEFAULT 0, error TEXT,
+    PRIMARY KEY (job_id, target_idx, idx)
+);
+"""
+# Everything but the items JSON, which only the full report needs
+SUBCATEGORY_COLUMNS = "job_id, target_idx, idx, name, url, status, attempts, item_count, error"
+
+class JobStore:
+    def __init__(self, path=JOBS_DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(job_subcategories)")}
+        if "item_count" not in columns:
+            # Stores created before item_count existed
+            self._conn.execute("ALTER TABLE job_subcategories ADD COLUMN item_count INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE job_subcategories SET item_count = json_array_length(items) WHERE items IS NOT NULL")
+        self._conn.commit()
+
+    def _write(self, sql, params=()):
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+    def _read(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def create_job(self, urls):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, created_at, updated_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, now, now),
+            )
+            self._conn.executemany(
+                "INSERT INTO job_targets (job_id, idx, url, status) VALUES (?, ?, ?, 'pending')",
+                [(job_id, i, url) for i, url in enumerate(urls)],
+            )
+            self._conn.commit()
+        return job_id
+
+    def job(self, job_id):
+        rows = self._read("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return dict(rows[0]) if rows else None
+
+    def set_job_status(self, job_id, status, new_run=False):
+        self._write(
+            "UPDATE jobs SET status = ?, updated_at = ?, runs = runs + ? WHERE id = ?",
+            (status, time.time(), 1 if new_run else 0, job_id),
+        )
+
+    def targets(self, job_id):
+        return [dict(r) for r in self._read("SELECT * FROM job_targets WHERE job_id = ? ORDER BY idx", (job_id,))]
+
+    def update_target(self, job_id, idx, **fields):
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        self._write(f"UPDATE job_targets SET {cols} WHERE job_id = ? AND idx = ?", (*fields.values(), job_id, idx))
+
+    def add_subcategories(self, job_id, target_idx, subcats, category):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO job_subcategories (job_id, target_idx, idx, name, url, status)"
+                " VALUES (?, ?, ?, ?, ?, 'pending')",
+                [(job_id, target_idx, i, name, url) for i, (name, url) in enumerate(subcats)],
+            )
+            self._conn.execute(
+                "UPDATE job_targets SET status = 'listed', category = ? WHERE job_id = ? AND idx = ?",
+                (category, job_id, target_idx),
+            )
+            self._conn.commit()
+
+    def subcategories(self, job_id, target_idx=None, status=None, with_items=False):
+        columns = "*" if with_items else SUBCATEGORY_COLUMNS
+        sql = f"SELECT {columns} FROM job_subcategories WHERE job_id = ?"
+        params = [job_id]
+        if target_idx is not None:
+            sql += " AND target_idx = ?"
+            params.append(target_idx)
+        if status is not None:
+            sql += " AND status = ?"
+            params.append(status)
+        return [dict(r) for r in self._read(sql + " ORDER BY target_idx, idx", params)]
+
+    def save_subcategory(self, job_id, target_idx, idx, status, attempts, items=None, error=None):
+        self._write(
+            "UPDATE job_subcategories SET status = ?, attempts = ?, items = ?, item_count = ?, error = ?"
+            " WHERE job_id = ? AND target_idx = ? AND idx = ?",
+            (status, attempts, json.dumps(items) if items is not None else None, len(items or ()), error,
+             job_id, target_idx, idx),
+        )
+
+# ----------------- WORKER -----------------
+
+_store = None
+_active = set()
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = JobStore()
+    return _store
+
+async def _store_items(items):
+    # SQLite writes and index updates stay off the loop mid-crawl. Threads, not
+    # the parse executor: a process pool would update a copy of the search index.
+    await asyncio.to_thread(record_scrape, items)
+    await asyncio.to_thread(index_scrape, items)
+
+async def _run_target(store, context, job_id, target, deadline):
+    from api.services.helper.carrefourbs import open_category, scrape_subcategory, SCRAPE_CONCURRENCY
+    if target["status"] == "pending":
+        info = await open_category(context, target["url"])
+        if info["status"] != "ok":
+            attempts = target["attempts"] + 1
+            status = "failed" if attempts >= JOB_MAX_ATTEMPTS else "pending"
+            store.update_target(job_id, target["idx"], status=status, attempts=attempts)
+            return
+        if info["direct_items"] is not None:
+            store.add_subcategories(job_id, target["idx"], [("DIRECT", target["url"])], info["category"])
+            store.save_subcategory(job_id, target["idx"], 0, "ok", 1, items=info["direct_items"])
+            await _store_items(info["direct_items"])
+        else:
+            store.add_subcategories(job_id, target["idx"], info["subcategories"], info["category"])
+        target["category"] = info["category"]
+
+    parsed_uri = urlparse(target["url"])
+    domain_base = f"{parsed_uri.scheme}://{parsed_uri.netloc}"
+    pending = store.subcategories(job_id, target["idx"], status="pending")
+    limit = asyncio.Semaphore(max(1, SCRAPE_CONCURRENCY))
+
+    async def worker(sub):
+        async with limit:
+            if time.time() > deadline:
+                return sub, None
+            log(f"➡️ [job {job_id[:8]}] Processing: {sub['name']}")
+            return sub, await scrape_subcategory(
+                context, target["category"], sub["name"], sub["url"], domain_base, deadline=deadline
+            )
+
+    tasks = [asyncio.ensure_future(worker(sub)) for sub in pending]
+    try:
+        # Checkpoint each subcategory as soon as it finishes, in completion order
+        for next_done in asyncio.as_completed(tasks):
+            sub, result = await next_done
+            if result is None or result["status"] == "skipped":
+                # Out of time budget: not a failed attempt, the next run retries it
+                continue
+            attempts = sub["attempts"] + result["attempts"]
+            if result["status"] == "ok":
+                store.save_subcategory(job_id, target["idx"], sub["idx"], "ok", attempts, items=result["items"])
+                await _store_items(result["items"])
+            else:
+                status = "failed" if attempts >= JOB_MAX_ATTEMPTS else "pending"
+                store.save_subcategory(job_id, target["idx"], sub["idx"], status, attempts, error=result.get("error"))
+    finally:
+        # Don't leave pages running on a context that is about to be checked back in
+        for task in tasks:
+            task.cancel()
+
+    if not store.subcategories(job_id, target["idx"], status="pending"):
+        store.update_target(job_id, target["idx"], status="done")
+
+async def run_job(job_id, budget=JOB_TIME_BUDGET):
+    if job_id in _active:
+        return
+    # Playwright is only loaded once a worker actually runs
+    from api.services.helper.browser_pool import browser_pool
+    _active.add(job_id)
+    store = get_store()
+    deadline = time.time() + budget
+    try:
+        store.set_job_status(job_id, "running", new_run=True)
+        log(f"🧵 Job {job_id[:8]} started")
+        async with browser_pool.context() as context:
+            for target in store.targets(job_id):
+                if target["status"] in ("done", "failed"):
+                    continue
+                if time.time() > deadline:
+                    break
+                await _run_target(store, context, job_id, target, deadline)
+        remaining = [t for t in store.targets(job_id) if t["status"] not in ("done", "failed")]
+        # Unfinished work stays queued; the next run picks up from the checkpoints
+        store.set_job_status(job_id, "queued" if remaining else "completed")
+        log(f"🧵 Job {job_id[:8]} {'paused' if remaining else 'completed'}")
+    except Exception as e:
+        log(f"💥 Job {job_id[:8]} crashed: {e}")
+        store.set_job_status(job_id, "queued")
+    finally:
+        _active.discard(job_id)
+
+def needs_worker(job):
+    # "running" with no live worker here means a previous run died mid-way
+    return job["status"] in ("queued", "running") and job["id"] not in _active
+
+# ----------------- REPORTING -----------------
+
+def job_report(job_id, include_items=True):
+    store = get_store()
+    job = store.job(job_id)
+    if job is None:
+        return None
+    targets = store.targets(job_id)
+    # Progress polls only need counts; the stored items are decoded for the full report alone
+    subcats = store.subcategories(job_id, with_items=include_items)
+    counts = {}
+    for sub in subcats:
+        counts[sub["status"]] = counts.get(sub["status"], 0) + 1
+
+    report = {
+        "id": job_id,
+        "status": job["status"],
+        "runs": job["runs"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "progress": {
+            "targets": len(targets),
+            "targets_done": sum(1 for t in targets if t["status"] == "done"),
+            "targets_failed": sum(1 for t in targets if t["status"] == "failed"),
+            "subcategories": len(subcats),
+            "subcategories_by_status": counts,
+            "items": sum(sub["item_count"] for sub in subcats),
+        },
+        "targets": [
+            {
+                "url": t["url"], "category": t["category"], "status": t["status"],
+                "subcategories": [
+                    {"name": s["name"], "url": s["url"], "status": s["status"],
+                     "attempts": s["attempts"], "error": s["error"]}
+                    for s in subcats if s["target_idx"] == t["idx"]
+                ],
+            }
+            for t in targets
+        ],
+    }
+    if include_items:
+        report["data"] = [item for sub in subcats if sub["items"] for item in json.loads(sub["items"])]
+    return report
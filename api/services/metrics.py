@@ -0,0 +1,172 @@
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# ----------------- CONFIG -----------------
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+COUNTER_HELP = {
+    "pages": "Page navigations by outcome",
+    "items": "Items extracted",
+    "blocks": "Block pages detected",
+    "retries": "Navigation and subcategory retries",
+    "bytes": "Response bytes loaded by pages",
+    "requests_blocked": "Sub-resource requests aborted by interception",
+}
+
+# ----------------- REGISTRY -----------------
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(STAGE_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(STAGE_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+
+class _RunStats:
+    # Per-scrape view of the same data, returned in the /api/scrape response
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+
+    def summary(self):
+        return {
+            "elapsed_s": round(time.perf_counter() - self.started, 3),
+            "stages": {
+                stage: {"count": h.count, "total_s": round(h.total, 4), "max_s": round(h.max, 4)}
+                for stage, h in sorted(self.stages.items(), key=lambda kv: -kv[1].total)
+            },
+            "counters": dict(self.counters),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            h = self._stages.get(stage)
+            if h is None:
+                h = self._stages[stage] = _Histogram()
+            h.observe(seconds)
+        run = _current_run.get()
+        if run is not None:
+            rh = run.stages.get(stage)
+            if rh is None:
+                rh = run.stages[stage] = _Histogram()
+            rh.observe(seconds)
+
+    def inc(self, name, value=1, label=""):
+        key = (name, label)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        run = _current_run.get()
+        if run is not None:
+            run_key = f"{name}:{label}" if label else name
+            run.counters[run_key] = run.counters.get(run_key, 0) + value
+
+    def render(self):
+        # Prometheus text exposition format 0.0.4
+        with self._lock:
+            stages = {k: (list(h.counts), h.total, h.count) for k, h in self._stages.items()}
+            counters = dict(self._counters)
+
+        lines = [
+            "# HELP scraper_stage_seconds Time spent per scraper stage",
+            "# TYPE scraper_stage_seconds histogram",
+        ]
+        for stage, (counts, total, count) in sorted(stages.items()):
+            cumulative = 0
+            for bound, n in zip(STAGE_BUCKETS, counts):
+                cumulative += n
+                lines.append(f'scraper_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'scraper_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'scraper_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'scraper_stage_seconds_count{{stage="{stage}"}} {count}')
+
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# HELP scraper_{name}_total {COUNTER_HELP.get(name, name)}")
+            lines.append(f"# TYPE scraper_{name}_total counter")
+            for (n, label), value in sorted(counters.items()):
+                if n != name:
+                    continue
+                labels = f'{{outcome="{label}"}}' if label else ""
+                lines.append(f"scraper_{name}_total{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+
+_current_run = contextvars.ContextVar("scrape_run", default=None)
+metrics = MetricsRegistry()
+
+# ----------------- SPANS -----------------
+
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+def span(stage):
+    # `with span("navigate"):` also works around awaits inside async code
+    return _Span(stage) if METRICS_ENABLED else _NO_SPAN
+
+def observe(stage, seconds):
+    if METRICS_ENABLED:
+        metrics.observe(stage, seconds)
+
+def inc(name, value=1, label=""):
+    if METRICS_ENABLED:
+        metrics.inc(name, value, label)
+
+def start_run():
+    # Tasks spawned after this copy the context, so their spans land in the same run
+    if not METRICS_ENABLED:
+        return None
+    run = _RunStats()
+    _current_run.set(run)
+    return run
+
+def end_run(run):
+    if run is None:
+        return None
+    _current_run.set(None)
+    return run.summary()
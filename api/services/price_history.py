@@ -0,0 +1,184 @@
+import os
+import sqlite3
+import threading
+import time
+
+# ----------------- CONFIG -----------------
+
+PRICE_HISTORY = os.getenv("PRICE_HISTORY", "1") == "1"
+PRICE_DB_PATH = os.getenv("PRICE_DB_PATH", "/tmp/price-service-history.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    name TEXT, category TEXT, subcategory TEXT, base_unit TEXT,
+    price TEXT NOT NULL, base_unit_price REAL,
+    first_seen REAL NOT NULL, last_seen REAL NOT NULL, last_changed REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS price_history (
+    item_id INTEGER NOT NULL REFERENCES items(id),
+    ts REAL NOT NULL,
+    price TEXT NOT NULL,
+    base_unit_price REAL
+);
+CREATE INDEX IF NOT EXISTS price_history_item_ts ON price_history(item_id, ts);
+CREATE INDEX IF NOT EXISTS price_history_ts ON price_history(ts);
+CREATE INDEX IF NOT EXISTS items_last_changed ON items(last_changed);
+"""
+
+def log(msg):
+    print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
+
+def _unit_price(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+# ----------------- STORE -----------------
+
+class PriceHistoryStore:
+    def __init__(self, path=PRICE_DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def record(self, items, ts=None):
+        # Bulk upsert of one scrape; history rows are only added when the price moved.
+        # Returns {"seen": n, "new": n, "changed": n}
+        ts = ts or time.time()
+        rows = {}
+        for item in items:
+            if item.get("Item_URL"):
+                rows[item["Item_URL"]] = item
+        if not rows:
+            return {"seen": 0, "new": 0, "changed": 0}
+
+        with self._lock, self._conn:
+            existing = {}
+            urls = list(rows)
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for r in self._conn.execute(f"SELECT id, url, price FROM items WHERE url IN ({marks})", chunk):
+                    existing[r["url"]] = (r["id"], r["price"])
+
+            new_items, changed, touched = [], [], []
+            for url, item in rows.items():
+                price = item.get("Price", "")
+                unit_price = _unit_price(item.get("Base_Unit_Price"))
+                meta = (item.get("Item_Name"), item.get("Category"), item.get("Subcategory"), item.get("Base_Unit"))
+                if url not in existing:
+                    new_items.append((url, *meta, price, unit_price, ts, ts, ts))
+                elif existing[url][1] != price:
+                    changed.append((existing[url][0], price, unit_price, ts, *meta))
+                else:
+                    touched.append((ts, existing[url][0]))
+
+            self._conn.executemany(
+                "INSERT INTO items (url, name, category, subcategory, base_unit, price, base_unit_price,"
+                " first_seen, last_seen, last_changed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                new_items,
+            )
+            self._conn.executemany(
+                "UPDATE items SET price = ?, base_unit_price = ?, last_seen = ?, last_changed = ?,"
+                " name = ?, category = ?, subcategory = ?, base_unit = ? WHERE id = ?",
+                [(p, u, t, t, n, c, s, b, item_id) for item_id, p, u, t, n, c, s, b in changed],
+            )
+            self._conn.executemany("UPDATE items SET last_seen = ? WHERE id = ?", touched)
+            self._conn.executemany(
+                "INSERT INTO price_history (item_id, ts, price, base_unit_price)"
+                " SELECT id, ?, ?, ? FROM items WHERE url = ?",
+                [(ts, r[5], r[6], r[0]) for r in new_items],
+            )
+            self._conn.executemany(
+                "INSERT INTO price_history (item_id, ts, price, base_unit_price) VALUES (?, ?, ?, ?)",
+                [(item_id, t, p, u) for item_id, p, u, t, *_ in changed],
+            )
+        return {"seen": len(rows), "new": len(new_items), "changed": len(changed)}
+
+    def history(self, url, limit=500):
+        with self._lock:
+            item = self._conn.execute("SELECT * FROM items WHERE url = ?", (url,)).fetchone()
+            if item is None:
+                return None
+            points = self._conn.execute(
+                "SELECT ts, price, base_unit_price FROM price_history WHERE item_id = ? ORDER BY ts DESC LIMIT ?",
+                (item["id"], limit),
+            ).fetchall()
+        return {
+            "url": url,
+            "name": item["name"],
+            "category": item["category"],
+            "base_unit": item["base_unit"],
+            "price": item["price"],
+            "first_seen": item["first_seen"],
+            "last_seen": item["last_seen"],
+            "history": [dict(p) for p in points],
+        }
+
+    def latest_items(self):
+        # Current row per item in the scraper's item shape
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, name, category, subcategory, base_unit, price, base_unit_price FROM items"
+            ).fetchall()
+        return [
+            {
+                "Category": r["category"], "Subcategory": r["subcategory"], "Item_Name": r["name"],
+                "Price": r["price"], "Currency": "PKR",
+                "Base_Unit_Price": f"{r['base_unit_price']:.2f}" if r["base_unit_price"] is not None else None,
+                "Base_Unit": r["base_unit"], "Item_URL": r["url"],
+            }
+            for r in rows
+        ]
+
+    def changes(self, since, limit=1000, include_new=False):
+        # Price moves recorded after `since`, with the price each one replaced.
+        # An item's first observation has no previous price and is not a move
+        # unless include_new is set.
+        moves_only = "" if include_new else "WHERE previous_price IS NOT NULL"
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT * FROM (
+                    SELECT i.url, i.name, i.category, i.base_unit, h.ts, h.price, h.base_unit_price,
+                        (SELECT p.price FROM price_history p
+                         WHERE p.item_id = h.item_id AND p.ts < h.ts ORDER BY p.ts DESC LIMIT 1) AS previous_price
+                    FROM price_history h JOIN items i ON i.id = h.item_id
+                    WHERE h.ts > ?
+                ) {moves_only}
+                ORDER BY ts DESC LIMIT ?
+                """,
+                (since, limit),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_price_store():
+    # Scrapes record from worker threads, so first use may race
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PriceHistoryStore()
+    return _store
+
+def record_scrape(items):
+    if not PRICE_HISTORY or not items:
+        return None
+    try:
+        stats = get_price_store().record(items)
+        log(f"🗃️ Price history: {stats['new']} new, {stats['changed']} changed of {stats['seen']}")
+        return stats
+    except Exception as e:
+        log(f"⚠️ Could not record price history: {e}")
+        return None
@@ -1,17 +1,79 @@
-import requests
+import asyncio
+import os
+import time
 from bs4 import BeautifulSoup
+from api.services.http_client import fetch_engine
+from api.services.cache import response_cache
+from api.services.executor import run_parse
 
-def scrape_online_price(url: str):
-    headers = {"User-Agent": "Mozilla/5.0"}
+# Unique URLs fetched at once per batch; per-host limits still apply underneath
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "32"))
+# A batch stops waiting after this many seconds (inside Vercel's 60 s
+# maxDuration); unfinished URLs are reported as errors, not dropped.
+BATCH_TIME_BUDGET = float(os.getenv("BATCH_TIME_BUDGET", "45"))
+# ~500 unique URLs at 32 in flight and ~1 s per fetch finish well inside the budget
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+
+def parse_price(html: str):
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Example: Scraping a generic title and price
+    # Adjust selectors based on your target site
+    price_element = soup.find("span", {"class": "price"}) 
+    return price_element.get_text() if price_element else "Not Found"
+
+async def fetch_online_price(url: str):
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # Example: Scraping a generic title and price
-        # Adjust selectors based on your target site
-        price_element = soup.find("span", {"class": "price"}) 
-        price = price_element.get_text() if price_element else "Not Found"
-        
+        response = await fetch_engine.get(url)
+        if not response.is_success:
+            # Error and block pages must not be parsed, reported or cached as prices
+            return {"price": "0", "source": url, "status": f"Error: HTTP {response.status_code}"}
+        # Up to BATCH_CONCURRENCY pages arrive together; parse them off the event loop
+        price = await run_parse(parse_price, response.text)
         return {"price": price, "source": url, "status": "success"}
     except Exception as e:
-        return {"price": "0", "source": url, "status": f"Error: {str(e)}"}
\ No newline at end of file
+        return {"price": "0", "source": url, "status": f"Error: {str(e)}"}
+
+async def cached_online_price(url: str):
+    # -> (data, cache_status, age); concurrent callers for one URL share a fetch
+    return await response_cache.get_or_fetch(
+        "get-price", url, lambda: fetch_online_price(url),
+        should_store=lambda d: d["status"] == "success"
+    )
+
+async def iter_online_prices(urls, concurrency=None, budget=None):
+    # Yields (index, data, cache_status, seconds) as fetches finish. Repeated
+    # URLs are fetched once and reported for every index that asked for them.
+    positions = {}
+    for i, url in enumerate(urls):
+        positions.setdefault(url, []).append(i)
+    limit = asyncio.Semaphore(max(1, concurrency or BATCH_CONCURRENCY))
+
+    async def worker(url):
+        async with limit:
+            started = time.perf_counter()
+            data, cache_status, _ = await cached_online_price(url)
+            return url, data, cache_status, time.perf_counter() - started
+
+    started = time.perf_counter()
+    budget = BATCH_TIME_BUDGET if budget is None else budget
+    tasks = [asyncio.ensure_future(worker(url)) for url in positions]
+    finished = set()
+    try:
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=budget):
+                url, data, cache_status, seconds = await next_done
+                finished.add(url)
+                for i in positions[url]:
+                    yield i, data, cache_status, seconds
+        except asyncio.TimeoutError:
+            seconds = time.perf_counter() - started
+            for url in positions:
+                if url in finished:
+                    continue
+                data = {"price": "0", "source": url, "status": "Error: batch time budget exceeded"}
+                for i in positions[url]:
+                    yield i, data, "SKIPPED", seconds
+    finally:
+        for task in tasks:
+            task.cancel()
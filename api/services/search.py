@@ -0,0 +1,190 @@
+import heapq
+import math
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+# ----------------- CONFIG -----------------
+
+SEARCH_INDEX = os.getenv("SEARCH_INDEX", "1") == "1"
+SEARCH_SORTS = ("unit_price", "price", "name")
+
+TOKEN = re.compile(r"[a-z0-9]+")
+UNIT_ALIASES = {
+    "k": "kg", "kg": "kg", "kgs": "kg", "kilo": "kg", "kilogram": "kg",
+    "l": "litre", "lt": "litre", "ltr": "litre", "liter": "litre", "litre": "litre",
+    "unit": "unit", "units": "unit", "pc": "unit", "pcs": "unit", "piece": "unit",
+}
+
+def log(msg):
+    print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
+
+def tokenize(text):
+    return TOKEN.findall((text or "").lower())
+
+def unit_key(base_unit):
+    # "1 Litre", "Litre" and "l" all index under "litre"
+    words = tokenize(base_unit)
+    if not words:
+        return None
+    word = words[-1]
+    return UNIT_ALIASES.get(word, word)
+
+def _number(value):
+    try:
+        number = float(str(value).replace(",", ""))
+    except (TypeError, ValueError):
+        return math.inf
+    return number if math.isfinite(number) else math.inf
+
+# ----------------- INDEX -----------------
+
+class SearchIndex:
+    # Latest item per Item_URL, an inverted index of Item_Name tokens and, per
+    # base unit, a list of (unit price, doc id) kept sorted with insort so the
+    # cheapest-per-unit query just walks the list. Items without a base unit
+    # sit under the None key so an unfiltered walk still reaches them.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = {}        # url -> doc id
+        self._docs = {}       # doc id -> (item, tokens, unit, unit_price)
+        self._postings = {}   # token -> set(doc ids)
+        self._by_unit = {}    # unit (or None) -> sorted [(unit_price, doc id)]
+        self._vocab = None    # sorted tokens for prefix lookups, rebuilt lazily
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _remove(self, doc_id):
+        _, tokens, unit, unit_price = self._docs.pop(doc_id)
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self._postings[token]
+                    self._vocab = None
+        entries = self._by_unit[unit]
+        pos = bisect_left(entries, (unit_price, doc_id))
+        if pos < len(entries) and entries[pos] == (unit_price, doc_id):
+            entries.pop(pos)
+
+    def add(self, items):
+        # Upserts by Item_URL; returns how many items were (re)indexed
+        added = 0
+        with self._lock:
+            for item in items:
+                url = item.get("Item_URL")
+                if not url:
+                    continue
+                doc_id = self._ids.get(url)
+                if doc_id is not None:
+                    self._remove(doc_id)
+                else:
+                    doc_id = self._ids[url] = self._next_id
+                    self._next_id += 1
+
+                tokens = frozenset(tokenize(item.get("Item_Name")))
+                unit = unit_key(item.get("Base_Unit"))
+                unit_price = _number(item.get("Base_Unit_Price"))
+                self._docs[doc_id] = (item, tokens, unit, unit_price)
+                for token in tokens:
+                    posting = self._postings.get(token)
+                    if posting is None:
+                        posting = self._postings[token] = set()
+                        self._vocab = None
+                    posting.add(doc_id)
+                insort(self._by_unit.setdefault(unit, []), (unit_price, doc_id))
+                added += 1
+        return added
+
+    def _prefix_ids(self, prefix):
+        # Last query word also matches as a prefix ("mil" -> milk, milky)
+        if self._vocab is None:
+            self._vocab = sorted(self._postings)
+        ids = set()
+        for i in range(bisect_left(self._vocab, prefix), len(self._vocab)):
+            token = self._vocab[i]
+            if not token.startswith(prefix):
+                break
+            ids |= self._postings[token]
+        return ids
+
+    def _matches(self, q):
+        words = tokenize(q)
+        if not words:
+            return None  # no text filter
+        sets = [self._postings.get(w, set()) for w in words[:-1]]
+        sets.append(self._prefix_ids(words[-1]))
+        sets.sort(key=len)
+        result = set(sets[0])
+        for s in sets[1:]:
+            result &= s
+            if not result:
+                break
+        return result
+
+    def search(self, q=None, unit=None, sort="unit_price", limit=20):
+        # -> (total matches, [item dicts])
+        with self._lock:
+            matches = self._matches(q)
+            wanted = unit_key(unit) if unit else None
+            if wanted is not None:
+                entries = self._by_unit.get(wanted, [])
+                if matches is None:
+                    matches = {doc_id for _, doc_id in entries}
+                else:
+                    matches = {doc_id for doc_id in matches if self._docs[doc_id][2] == wanted}
+            elif matches is None:
+                matches = self._docs.keys()
+
+            if sort == "unit_price" and len(matches) * 8 < (len(entries) if wanted is not None else len(self._docs)):
+                # Few matches: sorting them directly beats walking the whole unit list
+                picked = heapq.nsmallest(limit, matches, key=lambda d: (self._docs[d][3], d))
+            elif sort == "unit_price":
+                # Walk the pre-sorted unit list(s) and stop once `limit` matches are found
+                ordered = entries if wanted is not None else heapq.merge(*self._by_unit.values())
+                picked = []
+                for _, doc_id in ordered:
+                    if doc_id in matches:
+                        picked.append(doc_id)
+                        if len(picked) >= limit:
+                            break
+            elif sort == "price":
+                picked = heapq.nsmallest(limit, matches, key=lambda d: (_number(self._docs[d][0].get("Price")), d))
+            else:
+                picked = heapq.nsmallest(limit, matches, key=lambda d: ((self._docs[d][0].get("Item_Name") or "").lower(), d))
+            return len(matches), [self._docs[d][0] for d in picked]
+
+    def units(self):
+        with self._lock:
+            return {unit: len(entries) for unit, entries in self._by_unit.items() if unit is not None}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_search_index():
+    # Warmed from the price history store so a cold instance can answer before its first scrape
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = SearchIndex()
+                try:
+                    from api.services.price_history import PRICE_HISTORY, get_price_store
+                    if PRICE_HISTORY:
+                        count = index.add(get_price_store().latest_items())
+                        log(f"🔎 Search index warmed with {count} items")
+                except Exception as e:
+                    log(f"⚠️ Could not warm search index: {e}")
+                _index = index
+    return _index
+
+def index_scrape(items):
+    if not SEARCH_INDEX or not items:
+        return 0
+    return get_search_index().add(items)
@@ -0,0 +1,249 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
+
+# ----------------- CONFIG -----------------
+
+SNAPSHOT_ARCHIVE = os.getenv("SNAPSHOT_ARCHIVE", "0") == "1"
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "/tmp/price-service-snapshots")
+SNAPSHOT_ZSTD_LEVEL = int(os.getenv("SNAPSHOT_ZSTD_LEVEL", "6"))
+
+# kinds: "category" (subcategory links), "items" (product grid HTML),
+# "rows" (JSON rows captured from listing payloads)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL, ts REAL NOT NULL, kind TEXT NOT NULL,
+    category TEXT, subcategory TEXT,
+    digest TEXT NOT NULL, size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_ts ON snapshots(ts);
+CREATE INDEX IF NOT EXISTS snapshots_url_ts ON snapshots(url, ts);
+"""
+
+def log(msg):
+    print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
+
+def _codec():
+    # zstd when the zstandard package is installed, zlib otherwise
+    try:
+        import zstandard
+        return ".zst", zstandard.ZstdCompressor(level=SNAPSHOT_ZSTD_LEVEL).compress
+    except ImportError:
+        return ".zz", zlib.compress
+
+def _decompress(path, data):
+    if path.endswith(".zst"):
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+# ----------------- ARCHIVE -----------------
+
+class SnapshotArchive:
+    # Blobs are stored once per content hash under blobs/ab/<digest>.<ext>;
+    # the SQLite index maps (url, timestamp) to a blob.
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite3"), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._ext, self._compress = _codec()
+
+    def _blob_path(self, digest, ext):
+        return os.path.join(self.root, "blobs", digest[:2], digest + ext)
+
+    def _find_blob(self, digest):
+        for ext in (".zst", ".zz"):
+            path = self._blob_path(digest, ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def put(self, url, content, kind, category=None, subcategory=None, ts=None):
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+        if self._find_blob(digest) is None:
+            path = self._blob_path(digest, self._ext)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(self._compress(data))
+            os.replace(tmp, path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO snapshots (url, ts, kind, category, subcategory, digest, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, ts or time.time(), kind, category, subcategory, digest, len(data)),
+            )
+            self._conn.commit()
+        return digest
+
+    def link_latest(self, url, kind, category=None, subcategory=None, ts=None):
+        # Re-records the newest blob for this page at `ts`; storage is content-addressed,
+        # so an unchanged page costs one index row. -> digest, or None if never archived
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, size FROM snapshots WHERE url = ? AND kind = ? AND subcategory IS ?"
+                " ORDER BY ts DESC LIMIT 1",
+                (url, kind, subcategory),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "INSERT INTO snapshots (url, ts, kind, category, subcategory, digest, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, ts or time.time(), kind, category, subcategory, row["digest"], row["size"]),
+            )
+            self._conn.commit()
+        return row["digest"]
+
+    def read(self, digest):
+        path = self._find_blob(digest)
+        if path is None:
+            raise KeyError(digest)
+        with open(path, "rb") as f:
+            return _decompress(path, f.read()).decode("utf-8")
+
+    def entries(self, since=None, until=None, kind=None, latest=True):
+        # Snapshot rows in the window; latest=True keeps only the newest per (url, kind)
+        sql = "SELECT * FROM snapshots WHERE ts >= ? AND ts <= ?"
+        params = [since or 0, until or time.time() + 1]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        with self._lock:
+            rows = [dict(r) for r in self._conn.execute(sql + " ORDER BY ts", params)]
+        if not latest:
+            return rows
+        newest = {}
+        for row in rows:
+            newest[(row["url"], row["kind"], row["subcategory"])] = row
+        return sorted(newest.values(), key=lambda r: r["ts"])
+
+
+_archive = None
+
+def get_archive():
+    global _archive
+    if _archive is None:
+        _archive = SnapshotArchive()
+    return _archive
+
+def archive_snapshot(url, content, kind, category=None, subcategory=None):
+    # Never lets archiving break a live scrape
+    if not SNAPSHOT_ARCHIVE or not content:
+        return None
+    try:
+        return get_archive().put(url, content, kind, category, subcategory)
+    except Exception as e:
+        log(f"⚠️ Could not archive snapshot: {e}")
+        return None
+
+def archive_unchanged(url, kind, category=None, subcategory=None):
+    # A page reused via change detection still belongs to this crawl's snapshot set
+    if not SNAPSHOT_ARCHIVE:
+        return None
+    try:
+        return get_archive().link_latest(url, kind, category, subcategory)
+    except Exception as e:
+        log(f"⚠️ Could not archive snapshot: {e}")
+        return None
+
+# Compression, the blob write and the SQLite commit stay off the event loop
+
+async def archive_snapshot_async(url, content, kind, category=None, subcategory=None):
+    if not SNAPSHOT_ARCHIVE or not content:
+        return None
+    return await asyncio.to_thread(archive_snapshot, url, content, kind, category, subcategory)
+
+async def archive_unchanged_async(url, kind, category=None, subcategory=None):
+    if not SNAPSHOT_ARCHIVE:
+        return None
+    return await asyncio.to_thread(archive_unchanged, url, kind, category, subcategory)
+
+# ----------------- REPLAY -----------------
+
+def _replay_chunk(root, rows, parser):
+    # Runs in a worker process: no browser, just the HTML/row parsers
+    from api.services.helper.carrefourbs import parse_items, parse_subcategories, parse_network_rows
+
+    archive = SnapshotArchive(root)
+    out = []
+    for row in rows:
+        parsed = urlparse(row["url"])
+        domain_base = f"{parsed.scheme}://{parsed.netloc}"
+        content = archive.read(row["digest"])
+        if row["kind"] == "category":
+            result = parse_subcategories(content, domain_base, parser=parser)
+        elif row["kind"] == "rows":
+            result = parse_network_rows(json.loads(content), row["category"], row["subcategory"], domain_base)
+        else:
+            result = parse_items(content, row["category"], row["subcategory"], domain_base, parser=parser)
+        out.append((row["id"], result))
+    return out
+
+def replay(since=None, until=None, processes=None, parser=None, root=SNAPSHOT_DIR, chunk_size=16):
+    # Re-parses archived snapshots across cores. -> {"items": [...], "subcategories": {url: [...]}, ...}
+    started = time.time()
+    archive = SnapshotArchive(root)
+    rows = archive.entries(since, until)
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+    results = {}
+    if chunks:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for done in pool.map(_replay_chunk, [root] * len(chunks), chunks, [parser] * len(chunks)):
+                results.update(done)
+
+    items, subcategories = [], {}
+    for row in rows:
+        if row["kind"] == "category":
+            subcategories[row["url"]] = results[row["id"]]
+        else:
+            items.extend(results[row["id"]])
+    return {
+        "snapshots": len(rows),
+        "bytes": sum(r["size"] for r in rows),
+        "total_items": len(items),
+        "elapsed": round(time.time() - started, 3),
+        "subcategories": subcategories,
+        "items": items,
+    }
+
+# ----------------- CLI -----------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-parse archived page snapshots without a browser")
+    parser.add_argument("--root", default=SNAPSHOT_DIR)
+    parser.add_argument("--since", type=float, help="unix timestamp (default: 24h ago)")
+    parser.add_argument("--until", type=float)
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--parser", help="HTML backend: lxml or bs4")
+    parser.add_argument("--output", help="write the re-parsed items here")
+    parser.add_argument("--format", default="json", help="json, csv, arrow or parquet")
+    args = parser.parse_args()
+
+    since = args.since if args.since is not None else time.time() - 86400
+    result = replay(since, args.until, args.processes, args.parser, args.root)
+    log(f"🔁 Replayed {result['snapshots']} snapshots ({result['bytes'] // 1024} KB) "
+        f"→ {result['total_items']} items in {result['elapsed']}s")
+    if args.output:
+        from api.services.items import ItemBatch
+        with open(args.output, "wb") as f:
+            f.write(ItemBatch.from_dicts(result["items"]).export(args.format, total_items=result["total_items"]))
+
+
+if __name__ == "__main__":
+    main()
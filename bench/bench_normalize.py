@@ -0,0 +1,142 @@
+import json
+import re
+import sys
+import timeit
+
+from api.services.helper.normalize import (
+    normalize_to_bulk_price, normalize_to_bulk_price_v1, normalize_batch, quantity_rule, parse_price
+)
+
+# ----------------- REFERENCE (pre-refactor copies) -----------------
+
+def reference_normalize_to_bulk_price(price_str, unit_qty_str, item_name=""):
+    try:
+        clean_price_str = re.sub(r'[^\d.]', '', price_str.replace(',', ''))
+        price = float(clean_price_str)
+        search_text = f"{item_name} {unit_qty_str}".lower()
+        multi_patterns = [
+            r'pack of\s*(\d+)',
+            r'(\d+)\s*pcs',
+            r'(\d+)\s*units',
+            r'(\d+)\s*packs',
+            r'x\s*(\d+)(?!\s*[a-z])',
+            r'(?<![0-9])(\d+)\s*x\s*(?![0-9])',
+            r'(\d+)\s*x\s*\d+\s*[a-z]+',
+            r'\d+\s*[a-z]+\s*x\s*(\d+)'
+        ]
+        multiplier = 1
+        found_pack = False
+        for pattern in multi_patterns:
+            match = re.search(pattern, search_text)
+            if match:
+                val = next((g for g in match.groups() if g is not None), None)
+                if val:
+                    multiplier = float(val)
+                    found_pack = True
+                    break
+        if found_pack and multiplier > 1:
+            return (price / multiplier), "1 Unit"
+        weight_match = re.search(r'(\d+(?:\.\d+)?)\s*(g|gm|grams|kg|ml|l|liter|litre|lt)', search_text)
+        if weight_match:
+            value = float(weight_match.group(1))
+            unit = weight_match.group(2)
+            if value > 0:
+                if unit in ['g', 'gm', 'grams']:
+                    return (price / value) * 1000, "1 KG"
+                elif unit in ['ml', 'milliliter']:
+                    return (price / value) * 1000, "1 Litre"
+                elif unit in ['kg', 'l', 'liter', 'litre', 'lt']:
+                    return (price / value), f"1 {unit.upper().replace('LT', 'L')[:1]}"
+        return price, "Unit"
+    except Exception:
+        return price if 'price' in locals() else 0.0, "Unit"
+
+def reference_normalize_to_bulk_price_v1(price_str, unit_qty_str):
+    try:
+        price = float(re.sub(r'[^\d.]', '', price_str))
+        match = re.search(r'(\d+(?:\.\d+)?)\s*([a-zA-Z]+)', unit_qty_str.lower())
+        if not match:
+            return price, "Unit"
+        value = float(match.group(1))
+        unit = match.group(2)
+        if unit in ['g', 'gm', 'grams']:
+            return (price / value) * 1000, "KG"
+        elif unit in ['ml', 'milliliter']:
+            return (price / value) * 1000, "Litre"
+        elif unit in ['kg', 'l', 'liter']:
+            return price / value, unit.upper()
+        return price, "Unit"
+    except:
+        return 0.0, "Unknown"
+
+# ----------------- FIXTURES -----------------
+
+PRICES = ["1,250.00", "99.50", "0", "PKR 450", "", "abc", "1.2.3", "12"]
+QTYS = [
+    "1 Unit", "200 ml", "1.5l", "500g", "1 kg", "2 Lt", "250 gm", "0 g", "pack of 12", "pack of 1",
+    "12 pcs", "6pcs", "4 units", "3 packs", "x 12", "x 12g", "12 x", "12 x 200ml", "200ml x 12",
+    "6x1l", "1 litre", "750 grams", "Olpers Milk 1000 ml", "box mix 3", "Eggs 30 pcs - tray",
+    "Coke 1.5 L x 6", "Nestle Water 19 liter", "n/a", "", "10 ML", "2 X 500 G",
+]
+NAMES = ["", "Fresh Milk", "Tea Bags 100 pcs", "Juice 200ml x 24"]
+
+def fixture_rows():
+    for price in PRICES:
+        for qty in QTYS:
+            for name in NAMES:
+                yield price, qty, name
+
+# ----------------- CHECK + BENCH -----------------
+
+def check():
+    mismatches = []
+    for price, qty, name in fixture_rows():
+        expected = reference_normalize_to_bulk_price(price, qty, name)
+        got = normalize_to_bulk_price(price, qty, name)
+        if expected != got:
+            mismatches.append(("v2", price, qty, name, expected, got))
+        expected = reference_normalize_to_bulk_price_v1(price, qty)
+        got = normalize_to_bulk_price_v1(price, qty)
+        if expected != got:
+            mismatches.append(("v1", price, qty, "", expected, got))
+    try:
+        rows = list(fixture_rows())
+        values, units = normalize_batch([r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows])
+        for (price, qty, name), value, unit in zip(rows, values, units):
+            expected = reference_normalize_to_bulk_price(price, qty, name)
+            if expected != (float(value), unit):
+                mismatches.append(("batch", price, qty, name, expected, (float(value), unit)))
+    except ImportError:
+        pass
+    return mismatches
+
+def bench(number=3):
+    rows = list(fixture_rows()) * 20
+
+    def run(fn):
+        return min(timeit.repeat(lambda: [fn(p, q, n) for p, q, n in rows], number=1, repeat=number))
+
+    def cold():
+        quantity_rule.cache_clear()
+        parse_price.cache_clear()
+        return [normalize_to_bulk_price(p, q, n) for p, q, n in rows]
+
+    results = {
+        "rows": len(rows),
+        "reference_s": run(reference_normalize_to_bulk_price),
+        "normalize_s": run(normalize_to_bulk_price),
+        "normalize_cold_s": min(timeit.repeat(cold, number=1, repeat=number)),
+    }
+    try:
+        prices, qtys, names = zip(*rows)
+        results["normalize_batch_s"] = min(timeit.repeat(lambda: normalize_batch(prices, qtys, names), number=1, repeat=number))
+    except ImportError:
+        results["normalize_batch_s"] = None
+    return results
+
+if __name__ == "__main__":
+    mismatches = check()
+    for m in mismatches:
+        print("MISMATCH", m, file=sys.stderr)
+    print(json.dumps({"mismatches": len(mismatches), **bench()}, indent=2))
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,53 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Cold-start guard for the Vercel function: imports api.index in fresh
+# interpreters and fails when the light routes pull in scraper backends or
+# the app's own import time (on top of FastAPI itself) exceeds the budget.
+
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "150"))
+HEAVY_MODULES = ("playwright", "bs4", "lxml", "httpx", "requests", "numpy", "pyarrow",
+                 "api.services.helper.carrefourbs", "api.services.scraper")
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import fastapi
+t1 = time.perf_counter()
+import api.index
+t2 = time.perf_counter()
+heavy = [m for m in json.loads(sys.argv[1]) if m in sys.modules]
+print(json.dumps({"fastapi_ms": (t1 - t0) * 1000, "app_ms": (t2 - t1) * 1000, "heavy": heavy}))
+"""
+
+def probe():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.check_output([sys.executable, "-c", PROBE, json.dumps(HEAVY_MODULES)], cwd=root, text=True)
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when api.index cold-start imports exceed the budget")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    args = parser.parse_args()
+
+    runs = [probe() for _ in range(args.runs)]
+    heavy = sorted({m for r in runs for m in r["heavy"]})
+    report = {
+        "runs": args.runs,
+        "fastapi_ms": round(statistics.median(r["fastapi_ms"] for r in runs), 1),
+        "app_ms": round(statistics.median(r["app_ms"] for r in runs), 1),
+        "budget_ms": args.budget_ms,
+        "heavy_modules_loaded": heavy,
+    }
+    report["ok"] = not heavy and report["app_ms"] <= args.budget_ms
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
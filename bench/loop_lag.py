@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+import time
+
+from bench.make_snapshots import SNAPSHOT_DIR
+
+# Event-loop lag while pages are parsed, per PARSE_EXECUTOR mode. A ticker
+# sleeps `interval` in a loop; any overshoot is time the loop was blocked.
+
+DOMAIN = "https://www.carrefour.pk"
+
+async def measure(mode, pages, rounds, concurrency, interval, parser):
+    from api.services.executor import ParseExecutor
+    from api.services.helper.carrefourbs import parse_items
+
+    executor = ParseExecutor(mode=mode)
+    lags = []
+    stop = asyncio.Event()
+
+    async def ticker():
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(max(0.0, time.perf_counter() - started - interval))
+
+    limit = asyncio.Semaphore(concurrency)
+
+    async def parse(html):
+        async with limit:
+            return await executor.run(parse_items, html, "Fruits & Vegetables", "Bench", DOMAIN, parser=parser)
+
+    tick = asyncio.ensure_future(ticker())
+    await executor.run(len, "")  # start the pool outside the timed section
+    started = time.perf_counter()
+    results = await asyncio.gather(*(parse(html) for _ in range(rounds) for html in pages))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick
+    executor.close()
+
+    lags.sort()
+    return {
+        "mode": mode,
+        "pages": len(results),
+        "items": sum(len(r) for r in results),
+        "elapsed_s": round(elapsed, 3),
+        "lag_p50_ms": round(statistics.median(lags) * 1000, 2) if lags else None,
+        "lag_p99_ms": round(lags[int(len(lags) * 0.99) - 1] * 1000, 2) if lags else None,
+        "lag_max_ms": round(lags[-1] * 1000, 2) if lags else None,
+        "ticks": len(lags),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Event-loop lag during parsing, inline vs executor")
+    parser.add_argument("--modes", default="inline,thread,process")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.005)
+    parser.add_argument("--parser", default=os.getenv("HTML_PARSER", "lxml"))
+    args = parser.parse_args()
+
+    pages = [open(p, encoding="utf-8").read() for p in sorted(glob.glob(os.path.join(SNAPSHOT_DIR, "subcategory_*.html")))]
+    report = [
+        asyncio.run(measure(mode, pages, args.rounds, args.concurrency, args.interval, args.parser))
+        for mode in args.modes.split(",")
+    ]
+    print(json.dumps({"parser": args.parser, "results": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
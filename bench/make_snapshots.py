@@ -0,0 +1,115 @@
+import json
+import os
+import random
+
+# Writes deterministic stand-ins for saved Carrefour pages into bench/snapshots.
+# They use the same markup the scrapers target (breadcrumbs, text-primary
+# subcategory links, w-[134px] product cards); use record_snapshots.py to
+# replace them with real captures. The expected parser output for each page
+# is written to tests/golden straight from the generator's data, not from a
+# parser, so tests/test_parsers.py catches bugs every backend shares.
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), "snapshots")
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "golden")
+
+BRANDS = ["Olpers", "Nestle", "Dawn", "K&N's", "Shan", "National", "Tapal", "Lipton", "Dalda", "Nurpur", "Fresh Street"]
+PRODUCTS = [
+    ("Full Cream Milk", ["1 L", "250 ml", "1.5 L", "6 x 1 L"]),
+    ("Fresh Bananas", ["12 pcs", "1 kg", "1 Dozen"]),
+    ("Basmati Rice", ["5 kg", "1 kg", "500 g"]),
+    ("Tea Bags", ["100 pcs", "pack of 50", "200 g"]),
+    ("Mineral Water", ["1.5 L", "500 ml x 12", "19 liter"]),
+    ("Cooking Oil", ["3 L", "1 L", "5 Lt"]),
+    ("Red Apples", ["1 kg", "4 pcs", "Per Kg"]),
+    ("Chicken Nuggets", ["1000 g", "540 gm", "2 packs"]),
+    ("Orange Juice", ["200ml x 24", "1 litre", "250 ml"]),
+    ("Brown Bread", ["Large", "1 Unit", "400 g"]),
+]
+SUBCATEGORIES = [
+    ("Fresh Fruits", "FPAK1660100", 48),
+    ("Fresh Vegetables", "FPAK1660200", 64),
+    ("Herbs & Salads", "FPAK1660300", 24),
+]
+CATEGORY_PATH = "/mafpak/en/n/c/clp_FPAK1600000"
+
+def product(rng, sku):
+    base, sizes = rng.choice(PRODUCTS)
+    size = rng.choice(sizes)
+    name = f"{rng.choice(BRANDS)} {base} {size}"
+    price = rng.choice([49, 99, 180, 250, 399, 450, 999, 1250, 2399, 4599])
+    href = f"/mafpak/en/{name.lower().replace(' ', '-').replace('&', '')}/p/{sku}"
+    return {"name": name, "price": price, "size": size, "href": href}
+
+def card_html(p):
+    return f"""
+<div class="relative w-[134px] flex flex-col shrink-0">
+  <a href="{p['href']}" class="block"><img src="/images/{p['href'].rsplit('/', 1)[-1]}.jpg" alt=""></a>
+  <div class="mt-2 line-clamp-2 text-sm text-gray-900"><span>{p['name']}</span></div>
+  <div class="text-gray-500 truncate text-xs">{p['size']} - Carrefour</div>
+  <div class="flex items-end gap-0.5">
+    <div class="text-lg leading-5 font-bold">{p['price']:,}</div><div class="text-2xs font-bold">.00</div>
+    <span class="text-2xs">PKR</span>
+  </div>
+  <button class="mt-1 rounded bg-primary text-white">Add</button>
+</div>"""
+
+def page_html(title, breadcrumb, body):
+    crumbs = "".join(f'<li data-testid="breadcrumb-item">{c}</li>' for c in breadcrumb)
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{title}</title>
+<link rel="stylesheet" href="/static/app.css"><script src="/static/app.js" defer></script></head>
+<body><header class="sticky top-0"><nav><ol class="flex">{crumbs}</ol></nav></header>
+<main class="container mx-auto">{body}</main>
+<footer class="mt-8 text-xs">&copy; Carrefour Pakistan</footer></body></html>
+"""
+
+def write_golden(page, subcategory_links, cards):
+    # Same shape as the parsers return: [[name, href]] and [[name, price_main, price_decimal, href]]
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    with open(os.path.join(GOLDEN_DIR, page.replace(".html", ".json")), "w") as f:
+        json.dump({"subcategory_links": subcategory_links, "cards": cards}, f, indent=1)
+
+def main():
+    rng = random.Random(1660000)
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    links = "".join(
+        f'<a href="/mafpak/en/c/{code}" class="flex flex-col items-center">'
+        f'<img src="/images/{code}.png" alt=""><div class="text-primary text-sm">{name}</div></a>'
+        for name, code, _ in SUBCATEGORIES
+    )
+    with open(os.path.join(SNAPSHOT_DIR, "category.html"), "w") as f:
+        f.write(page_html("Fruits & Vegetables", ["Home", "Fruits & Vegetables"], f'<section class="grid grid-cols-4">{links}</section>'))
+    write_golden("category.html", [[name, f"/mafpak/en/c/{code}"] for name, code, _ in SUBCATEGORIES], [])
+
+    sku = 100000
+    listings = {}
+    for name, code, count in SUBCATEGORIES:
+        products = []
+        for _ in range(count):
+            sku += 1
+            products.append(product(rng, sku))
+        cards = "".join(card_html(p) for p in products)
+        with open(os.path.join(SNAPSHOT_DIR, f"subcategory_{code}.html"), "w") as f:
+            f.write(page_html(name, ["Home", "Fruits & Vegetables", name], f'<section class="flex flex-wrap gap-2">{cards}</section>'))
+        write_golden(f"subcategory_{code}.html", [], [[p["name"], f"{p['price']:,}", ".00", p["href"]] for p in products])
+        listings[code] = {
+            "data": {
+                "products": [
+                    {"id": p["href"].rsplit("/", 1)[-1], "name": p["name"], "size": p["size"],
+                     "price": {"price": float(p["price"]), "currency": "PKR"},
+                     "links": {"productUrl": {"href": p["href"]}}}
+                    for p in products
+                ],
+                "pagination": {"currentPage": 0, "totalPages": 1},
+            }
+        }
+    with open(os.path.join(SNAPSHOT_DIR, "listings.json"), "w") as f:
+        json.dump(listings, f, indent=1)
+
+    with open(os.path.join(SNAPSHOT_DIR, "blocked.html"), "w") as f:
+        f.write(page_html("Error", [], "<h1>Sorry, we are experiencing technical issues at our end.</h1>"))
+    write_golden("blocked.html", [], [])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from bench.make_snapshots import SNAPSHOT_DIR, CATEGORY_PATH
+
+# Local stand-in for carrefour.pk serving the saved snapshots:
+#   /mafpak/en/n/c/clp_*  -> category.html
+#   /mafpak/en/c/<code>   -> subcategory_<code>.html
+#   /api/v1/products?category=<code> -> listings.json[code]
+# with optional per-request latency and a probability of serving the block page.
+
+class StorefrontHandler(BaseHTTPRequestHandler):
+    server_version = "MockStorefront/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        store = self.server.storefront
+        store.requests += 1
+        if store.latency:
+            time.sleep(store.latency * random.uniform(0.5, 1.5))
+        path, _, query = self.path.partition("?")
+
+        if path.startswith("/mafpak/") and random.random() < store.block_rate:
+            store.blocks += 1
+            return self._send(200, store.page("blocked.html"))
+        if path.startswith("/mafpak/en/n/c/"):
+            return self._send(200, store.page("category.html"))
+        if path.startswith("/mafpak/en/c/"):
+            body = store.page(f"subcategory_{path.rstrip('/').rsplit('/', 1)[-1]}.html")
+            return self._send(200, body) if body else self._send(404, "not found")
+        if path.startswith("/api/v1/products"):
+            params = dict(p.split("=", 1) for p in query.split("&") if "=" in p)
+            listing = store.listings.get(params.get("category", ""))
+            if listing is None:
+                return self._send(404, "{}", "application/json")
+            return self._send(200, json.dumps(listing), "application/json")
+        return self._send(404, "not found")
+
+
+class MockStorefront:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, block_rate=0.0, snapshot_dir=SNAPSHOT_DIR):
+        self.latency = latency
+        self.block_rate = block_rate
+        self.snapshot_dir = snapshot_dir
+        self.requests = 0
+        self.blocks = 0
+        self._pages = {}
+        with open(os.path.join(snapshot_dir, "listings.json")) as f:
+            self.listings = json.load(f)
+        self.httpd = ThreadingHTTPServer((host, port), StorefrontHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.storefront = self
+        self._thread = None
+
+    def page(self, name):
+        if name not in self._pages:
+            path = os.path.join(self.snapshot_dir, name)
+            self._pages[name] = open(path, encoding="utf-8").read() if os.path.exists(path) else None
+        return self._pages[name]
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def category_url(self):
+        return self.base_url + CATEGORY_PATH
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve saved Carrefour snapshots locally")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each response")
+    parser.add_argument("--block-rate", type=float, default=0.0, help="probability of serving the block page")
+    args = parser.parse_args()
+    store = MockStorefront(port=args.port, latency=args.latency, block_rate=args.block_rate)
+    print(f"Serving {store.category_url}", flush=True)
+    try:
+        store.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
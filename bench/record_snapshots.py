@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+
+from bench.make_snapshots import SNAPSHOT_DIR
+
+# Captures live Carrefour pages into bench/snapshots so run_bench.py measures
+# real markup, plus the listing JSON each subcategory page loaded (listings.json)
+# for the network-vs-DOM check. Needs a browser (BROWSERLESS_TOKEN or BROWSER_MODE=local).
+# tests/golden then needs the expected output of each new page, checked by hand.
+
+DEFAULT_URL = "https://www.carrefour.pk/mafpak/en/n/c/clp_FPAK1600000"
+
+def snapshot_code(url):
+    code = re.search(r"(FPAK\d+)", url)
+    return code.group(1) if code else str(abs(hash(url)))
+
+def snapshot_name(url):
+    return f"subcategory_{snapshot_code(url)}.html"
+
+async def record(url, limit):
+    from urllib.parse import urlparse
+    from api.services.helper.browser_pool import browser_pool
+    from api.services.helper.carrefourbs import safe_goto, extract_subcategories, wait_for_cards
+    from api.services.helper.network_capture import ResponseCapture
+
+    parsed = urlparse(url)
+    domain_base = f"{parsed.scheme}://{parsed.netloc}"
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    listings = {}
+    try:
+        async with browser_pool.context() as context:
+            page = await context.new_page()
+            if not await safe_goto(page, url):
+                raise SystemExit(f"Could not load {url}")
+            with open(os.path.join(SNAPSHOT_DIR, "category.html"), "w", encoding="utf-8") as f:
+                f.write(await page.content())
+            subcats = await extract_subcategories(page, domain_base)
+            capture = ResponseCapture(page)
+            for name, sub_url in subcats[:limit]:
+                capture.reset()
+                if not await safe_goto(page, sub_url):
+                    print(f"skipped {name}: blocked or failed")
+                    continue
+                await wait_for_cards(page)
+                path = os.path.join(SNAPSHOT_DIR, snapshot_name(sub_url))
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(await page.content())
+                print(f"saved {name} -> {path}")
+                await capture.wait()
+                if capture.payloads:
+                    # First listing call only: it covers the same products as the saved HTML
+                    listings[snapshot_code(sub_url)] = capture.payloads[0][1]
+                else:
+                    print(f"no listing payload captured for {name}")
+            await page.close()
+    finally:
+        await browser_pool.close()
+    if listings:
+        with open(os.path.join(SNAPSHOT_DIR, "listings.json"), "w") as f:
+            json.dump(listings, f, indent=1)
+        print(f"saved {len(listings)} listing payloads -> listings.json")
+
+def main():
+    parser = argparse.ArgumentParser(description="Save live category pages as benchmark snapshots")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--limit", type=int, default=3, help="subcategory pages to save")
+    args = parser.parse_args()
+    asyncio.run(record(args.url, args.limit))
+
+
+if __name__ == "__main__":
+    main()
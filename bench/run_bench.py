@@ -0,0 +1,195 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+# Offline knobs must be set before the scraper modules read their config
+os.environ.setdefault("BROWSER_MODE", "local")
+os.environ.setdefault("RATE_STATE_PATH", "")
+os.environ.setdefault("RATE_INITIAL", "50")
+os.environ.setdefault("RATE_MAX", "200")
+os.environ.setdefault("RATE_BLOCK_COOLDOWN", "1")
+os.environ.setdefault("CHANGE_DETECTION", "0")
+os.environ.setdefault("PRICE_HISTORY", "0")
+os.environ.setdefault("EXTRACTION_MODE", "dom")
+
+from bench.make_snapshots import SNAPSHOT_DIR
+from bench import bench_normalize
+
+DOMAIN = "https://www.carrefour.pk"
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+def best_of(fn, repeat):
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+# ----------------- PARSE -----------------
+
+def bench_parse(repeat):
+    from api.services.helper.carrefourbs import parse_items, parse_subcategories
+    from api.services.helper.parsers import PARSERS
+
+    pages = {os.path.basename(p): open(p, encoding="utf-8").read()
+             for p in sorted(glob.glob(os.path.join(SNAPSHOT_DIR, "subcategory_*.html")))}
+    category = open(os.path.join(SNAPSHOT_DIR, "category.html"), encoding="utf-8").read()
+    total_bytes = sum(len(h) for h in pages.values())
+
+    results, outputs = {}, {}
+    for name in PARSERS:
+        outputs[name] = (
+            [parse_items(h, "Fruits & Vegetables", page, DOMAIN, parser=name) for page, h in pages.items()],
+            parse_subcategories(category, DOMAIN, parser=name),
+        )
+        items = sum(len(x) for x in outputs[name][0])
+        seconds = best_of(
+            lambda: [parse_items(h, "Fruits & Vegetables", page, DOMAIN, parser=name) for page, h in pages.items()],
+            repeat,
+        )
+        sub_seconds = best_of(lambda: parse_subcategories(category, DOMAIN, parser=name), repeat)
+        results[name] = {
+            "pages": len(pages),
+            "items": items,
+            "scrape_items_s": round(seconds, 6),
+            "items_per_s": round(items / seconds, 1),
+            "mb_per_s": round(total_bytes / seconds / 1e6, 3),
+            "extract_subcategories_s": round(sub_seconds, 6),
+        }
+    # Golden check: every backend must agree with the BeautifulSoup reference
+    reference = outputs["bs4"]
+    results["backends_agree"] = all(out == reference for out in outputs.values())
+    return results
+
+# ----------------- NETWORK PAYLOADS -----------------
+
+def bench_network(repeat):
+    from api.services.helper.network_capture import parse_listing_payload
+    from api.services.helper.carrefourbs import parse_network_rows
+
+    with open(os.path.join(SNAPSHOT_DIR, "listings.json")) as f:
+        listings = json.load(f)
+
+    def run():
+        return [parse_network_rows(parse_listing_payload(p), "Fruits & Vegetables", code, DOMAIN)
+                for code, p in listings.items()]
+
+    items = sum(len(x) for x in run())
+    seconds = best_of(run, repeat)
+    return {"payloads": len(listings), "items": items, "seconds": round(seconds, 6),
+            "items_per_s": round(items / seconds, 1), "dom_mismatches": check_network_parity(listings)}
+
+def check_network_parity(listings):
+    # Golden check: a listing payload must yield exactly what parse_items reads
+    # off the same subcategory's HTML. -> codes whose rows differ
+    from api.services.helper.network_capture import parse_listing_payload
+    from api.services.helper.carrefourbs import parse_items, parse_network_rows
+
+    def by_url(items):
+        return sorted(items, key=lambda item: item["Item_URL"])
+
+    mismatches = []
+    for code, payload in sorted(listings.items()):
+        path = os.path.join(SNAPSHOT_DIR, f"subcategory_{code}.html")
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            dom = parse_items(f.read(), "Fruits & Vegetables", code, DOMAIN)
+        network = parse_network_rows(parse_listing_payload(payload), "Fruits & Vegetables", code, DOMAIN)
+        if by_url(network) != by_url(dom):
+            mismatches.append(code)
+    return mismatches
+
+# ----------------- END TO END -----------------
+
+def bench_e2e(latency, block_rate, concurrency):
+    from bench.mock_storefront import MockStorefront
+    from api.services.helper.carrefourbs import run_carrefour_scraper
+    from api.services.helper.browser_pool import browser_pool
+
+    async def run():
+        try:
+            start = time.perf_counter()
+            items = await run_carrefour_scraper(store.category_url, concurrency=concurrency)
+            return items, time.perf_counter() - start
+        finally:
+            await browser_pool.close()
+
+    try:
+        import playwright  # noqa: F401
+    except ImportError:
+        return {"status": "skipped", "reason": "playwright is not installed"}
+
+    with MockStorefront(latency=latency, block_rate=block_rate) as store:
+        items, seconds = asyncio.run(run())
+        if store.requests == 0:
+            # The orchestrator logs and swallows launch errors; nothing reached the mock
+            return {"status": "skipped", "reason": "browser never reached the mock storefront"}
+        return {"status": "ok", "items": len(items), "seconds": round(seconds, 3), "requests": store.requests,
+                "blocks": store.blocks, "latency": latency, "block_rate": block_rate,
+                "concurrency": concurrency}
+
+# ----------------- MAIN -----------------
+
+def compare(results, baseline):
+    # Flattened ratio current/baseline for every numeric timing key
+    ratios = {}
+
+    def walk(cur, base, prefix):
+        for key, value in cur.items():
+            other = base.get(key) if isinstance(base, dict) else None
+            if isinstance(value, dict):
+                walk(value, other or {}, f"{prefix}{key}.")
+            elif (key.endswith("_s") and "_per_" not in key) or key == "seconds":
+                if isinstance(value, (int, float)) and isinstance(other, (int, float)) and other:
+                    ratios[prefix + key] = round(value / other, 3)
+
+    walk(results, baseline, "")
+    return ratios
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scraper benchmarks over saved snapshots")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--e2e", action="store_true", help="also run run_carrefour_scraper against the mock storefront")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--block-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--out", help="write the JSON report here as well as stdout")
+    parser.add_argument("--baseline", help="earlier report to compare timings against")
+    args = parser.parse_args()
+
+    results = {
+        "parse": bench_parse(args.repeat),
+        "network": bench_network(args.repeat),
+        "normalize": bench_normalize.bench(args.repeat),
+        "normalize_mismatches": len(bench_normalize.check()),
+    }
+    if args.e2e:
+        results["e2e"] = bench_e2e(args.latency, args.block_rate, args.concurrency)
+
+    report = {"commit": git_commit(), "timestamp": time.time(), "python": platform.python_version(),
+              "results": results}
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["vs_baseline"] = compare(results, json.load(f)["results"])
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    ok = (results["parse"]["backends_agree"] and results["normalize_mismatches"] == 0
+          and not results["network"]["dom_mismatches"])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import deque
+
+from api.services.helper.ratelimit import AdaptiveRateLimiter
+
+# Simulated storefront: serves up to `capacity` requests per (scaled) second
+# and answers with a block page for `penalty` seconds once that is exceeded.
+# All times are multiplied by --scale so a run takes seconds, not minutes.
+
+class SimulatedSite:
+    def __init__(self, capacity, penalty, latency, scale):
+        self.capacity = capacity
+        self.penalty = penalty * scale
+        self.latency = latency * scale
+        self.window = 1.0 * scale
+        self.recent = deque()
+        self.blocked_until = 0.0
+        self.served = 0
+        self.blocked = 0
+
+    async def get(self):
+        now = time.monotonic()
+        await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+        while self.recent and now - self.recent[0] > self.window:
+            self.recent.popleft()
+        self.recent.append(now)
+        if now < self.blocked_until:
+            self.blocked += 1
+            return False
+        if len(self.recent) > self.capacity:
+            self.blocked_until = now + self.penalty
+            self.blocked += 1
+            return False
+        self.served += 1
+        return True
+
+
+async def run_fixed(site, workers, duration, scale):
+    # The old safe_goto pacing: 4-7 s after every page, 12-18 s after a block
+    end = time.monotonic() + duration
+
+    async def worker():
+        while time.monotonic() < end:
+            ok = await site.get()
+            await asyncio.sleep(random.uniform(4, 7) * scale)
+            if not ok:
+                await asyncio.sleep(random.uniform(12, 18) * scale)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+
+
+async def run_adaptive(site, workers, duration, scale):
+    limiter = AdaptiveRateLimiter(
+        initial_rate=0.5 / scale, min_rate=0.05 / scale, max_rate=4 / scale, increase=0.05 / scale,
+        block_cooldown=12 * scale, max_cooldown=60 * scale, state_path=None,
+    )
+    end = time.monotonic() + duration
+    url = "https://sim.example/"
+
+    async def worker():
+        while time.monotonic() < end:
+            await limiter.acquire(url)
+            limiter.report(url, "ok" if await site.get() else "blocked")
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+
+
+def summarize(name, site, duration, scale):
+    total = site.served + site.blocked
+    return {
+        "policy": name,
+        "served": site.served,
+        "blocked": site.blocked,
+        "block_rate": round(site.blocked / total, 4) if total else 0.0,
+        # pages per simulated (unscaled) second
+        "throughput": round(site.served / (duration / scale), 3),
+    }
+
+
+async def main(args):
+    results = []
+    for name, policy in (("fixed_delay", run_fixed), ("adaptive", run_adaptive)):
+        random.seed(args.seed)
+        site = SimulatedSite(args.capacity, args.penalty, args.latency, args.scale)
+        await policy(site, args.workers, args.duration, args.scale)
+        results.append(summarize(name, site, args.duration, args.scale))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare fixed sleeps with the adaptive limiter on a simulated site")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--capacity", type=int, default=2, help="requests per simulated second before blocking")
+    parser.add_argument("--penalty", type=float, default=20, help="simulated seconds a block lasts")
+    parser.add_argument("--latency", type=float, default=0.8, help="simulated seconds per page")
+    parser.add_argument("--duration", type=float, default=10, help="wall-clock seconds per policy")
+    parser.add_argument("--scale", type=float, default=0.02, help="wall seconds per simulated second")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
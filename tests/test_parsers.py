@@ -0,0 +1,54 @@
+import json
+import os
+
+import pytest
+
+from api.services.helper.parsers import PARSERS
+
+# Golden outputs live in tests/golden, one per page in bench/snapshots. They are
+# written by bench/make_snapshots.py from the data it generated the HTML with;
+# after recording live pages, check the new outputs by hand before updating them.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_DIR = os.path.join(ROOT, "bench", "snapshots")
+GOLDEN_DIR = os.path.join(ROOT, "tests", "golden")
+
+PAGES = sorted(name[:-len(".json")] for name in os.listdir(GOLDEN_DIR) if name.endswith(".json"))
+
+
+def make_parser(name):
+    try:
+        return PARSERS[name]()
+    except ImportError as e:
+        pytest.skip(f"{name} backend not installed: {e}")
+
+
+def load(page):
+    with open(os.path.join(SNAPSHOT_DIR, page + ".html"), encoding="utf-8") as f:
+        html = f.read()
+    with open(os.path.join(GOLDEN_DIR, page + ".json"), encoding="utf-8") as f:
+        golden = json.load(f)
+    return html, golden
+
+
+@pytest.mark.parametrize("backend", sorted(PARSERS))
+@pytest.mark.parametrize("page", PAGES)
+def test_cards_match_golden(backend, page):
+    html, golden = load(page)
+    rows = make_parser(backend).cards(html)
+    assert [list(row) for row in rows] == golden["cards"]
+
+
+@pytest.mark.parametrize("backend", sorted(PARSERS))
+@pytest.mark.parametrize("page", PAGES)
+def test_subcategory_links_match_golden(backend, page):
+    html, golden = load(page)
+    links = make_parser(backend).subcategory_links(html)
+    assert [list(link) for link in links] == golden["subcategory_links"]
+
+
+@pytest.mark.parametrize("backend", sorted(PARSERS))
+def test_empty_page(backend):
+    parser = make_parser(backend)
+    assert parser.cards("") == []
+    assert parser.subcategory_links("") == []